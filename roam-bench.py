@@ -2,12 +2,17 @@
 """Roam benchmark - automated quality and performance metrics across public repos."""
 
 import argparse
+import contextlib
+import io
 import json
 import os
 import sqlite3
 import subprocess
 import sys
+import threading
 import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from functools import partial
 from pathlib import Path
@@ -65,6 +70,146 @@ def roam_cmd(args, cwd, timeout=120):
     return run([sys.executable, "-m", "roam"] + args, cwd=cwd, timeout=timeout)
 
 
+def roam_cmd_inproc(args, cwd, timeout=120):
+    """Run a roam CLI command inside this interpreter.
+
+    Same (returncode, stdout, stderr) contract as :func:`roam_cmd`, but
+    skips the interpreter bootstrap and roam import chain so the timing
+    reflects the command itself.  *timeout* is accepted for signature
+    parity and not enforced.
+    """
+    import click
+    from roam.cli import cli
+
+    out, err = io.StringIO(), io.StringIO()
+    prev_cwd = os.getcwd()
+    rc = 0
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                result = cli.main(args, prog_name="roam", standalone_mode=False)
+                if isinstance(result, int):
+                    rc = result
+            except click.exceptions.Exit as e:
+                rc = e.exit_code
+            except click.ClickException as e:
+                e.show(file=err)
+                rc = e.exit_code
+            except click.Abort:
+                rc = 1
+            except SystemExit as e:
+                rc = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc(file=err)
+                rc = 1
+    finally:
+        os.chdir(prev_cwd)
+    return rc, out.getvalue(), err.getvalue()
+
+
+_WARM_IMPORTS = (
+    "import importlib, roam.cli\n"
+    "for mod, _ in roam.cli._COMMANDS.values():\n"
+    "    importlib.import_module(mod)\n"
+)
+
+
+def warm_interpreter():
+    """Import roam and every command module once in a throwaway child.
+
+    Writes any missing ``__pycache__`` entries and pulls the modules into
+    the OS page cache, so the first timed cold-start command doesn't also
+    pay for bytecode compilation.  The run itself is not timed.
+    """
+    run([sys.executable, "-c", _WARM_IMPORTS], timeout=120)
+
+
+def serve_worker():
+    """Worker loop: read JSON ``{"args", "cwd"}`` lines from stdin and answer
+    each with a JSON ``{"rc", "stdout", "stderr"}`` line on stdout."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        req = json.loads(line)
+        rc, out, err = roam_cmd_inproc(req["args"], req["cwd"])
+        sys.stdout.write(json.dumps({"rc": rc, "stdout": out, "stderr": err}) + "\n")
+        sys.stdout.flush()
+
+
+class RoamWorker:
+    """A long-lived child interpreter that runs roam commands on request.
+
+    Keeps heavy commands (``index``) out of the benchmark process while
+    paying the interpreter bootstrap and roam import chain only once for
+    the whole run instead of once per invocation.
+    """
+
+    def __init__(self):
+        self.proc = None
+        self._lines = []
+        self._ready = threading.Condition()
+
+    def _start(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--worker"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            encoding="utf-8", errors="replace",
+        )
+        # Fresh list per child, so a previous child's pump cannot leak
+        # its end-of-stream marker into this one's replies.
+        with self._ready:
+            self._lines = []
+        threading.Thread(
+            target=self._pump, args=(self.proc, self._lines), daemon=True,
+        ).start()
+
+    def _pump(self, proc, lines):
+        for line in proc.stdout:
+            with self._ready:
+                lines.append(line)
+                self._ready.notify()
+        with self._ready:
+            lines.append(None)
+            self._ready.notify()
+
+    def __call__(self, args, cwd, timeout=120):
+        """Same (returncode, stdout, stderr) contract as :func:`roam_cmd`."""
+        if self.proc is None or self.proc.poll() is not None:
+            self._start()
+        try:
+            self.proc.stdin.write(json.dumps({"args": args, "cwd": str(cwd)}) + "\n")
+            self.proc.stdin.flush()
+        except OSError as e:
+            self.close()
+            return -1, "", str(e)
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._lines, timeout=timeout):
+                self.close()
+                return -1, "", f"TIMEOUT after {timeout}s"
+            line = self._lines.pop(0)
+        if line is None:
+            self.close()
+            return -1, "", "worker exited unexpectedly"
+        resp = json.loads(line)
+        return resp["rc"], resp["stdout"], resp["stderr"]
+
+    def close(self, timeout=5):
+        """Ask the worker to exit by closing its stdin; kill it if it hangs."""
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+
 def head_commit(repo_dir):
     """Get HEAD commit hash."""
     rc, out, _ = run(["git", "rev-parse", "--short", "HEAD"], cwd=repo_dir)
@@ -115,11 +260,11 @@ def setup_repos(names):
 
 # ── Phase 2: Index repos ───────────────────────────────────────────────────
 
-def index_repo(name, idx, total):
+def index_repo(name, idx, total, runner=roam_cmd):
     repo_dir = BENCH_DIR / name
     print(f"  [{idx}/{total}] {name}: indexing ...")
     t0 = time.time()
-    rc, out, err = roam_cmd(["index", "--force"], cwd=repo_dir, timeout=600)
+    rc, out, err = runner(["index", "--force"], cwd=repo_dir, timeout=600)
     elapsed = time.time() - t0
     if rc != 0:
         print(f"    INDEX FAILED ({fmt_duration(elapsed)}): {err[:300]}")
@@ -149,10 +294,11 @@ def open_db(repo_dir):
 
 
 def basic_counts(conn):
-    files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
-    symbols = conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
-    edges = conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
-    return files, symbols, edges
+    row = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM files), (SELECT COUNT(*) FROM symbols), "
+        "(SELECT COUNT(*) FROM edges)"
+    ).fetchone()
+    return row[0], row[1], row[2]
 
 
 def language_breakdown(conn):
@@ -504,8 +650,22 @@ def sample_args(conn):
     return file_path, sym_name, sym_name2, dir_path
 
 
-def validate_commands(name):
-    """Run all 28 commands, return results dict with per-command timing."""
+def timed_roam(runner, args, cwd, timeout=120):
+    """Run *args* with *runner*, return (returncode, stdout, stderr, elapsed_s)."""
+    t0 = time.perf_counter()
+    rc, stdout, err = runner(args, cwd=cwd, timeout=timeout)
+    return rc, stdout, err, round(time.perf_counter() - t0, 2)
+
+
+def validate_commands(name, runner=roam_cmd_inproc, jobs=1):
+    """Run all 28 commands, return results dict with per-command timing.
+
+    *runner* is :func:`roam_cmd_inproc` by default; pass :func:`roam_cmd`
+    to launch a fresh interpreter per command for isolation runs.
+    With *jobs* > 1 the commands (all read-only against the built index)
+    run concurrently in a process pool; each worker process has its own
+    cwd and stdout, so the in-process runner stays safe.
+    """
     repo_dir = BENCH_DIR / name
     conn = open_db(repo_dir)
     if conn is None:
@@ -555,32 +715,35 @@ def validate_commands(name):
         "why":         ["why", sym_name] if sym_name else None,
     }
 
+    to_run = [c for c in ALL_COMMANDS if c != "index" and cmds.get(c) is not None]
+    if jobs > 1 and len(to_run) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(to_run))) as ex:
+            futs = {c: ex.submit(timed_roam, runner, cmds[c], repo_dir)
+                    for c in to_run}
+            outcomes = {c: f.result() for c, f in futs.items()}
+    else:
+        outcomes = {c: timed_roam(runner, cmds[c], repo_dir) for c in to_run}
+
     passed = 0
     failures = []
     timings = {}
 
     for cmd_name in ALL_COMMANDS:
-        if cmd_name == "index":
-            passed += 1
-            timings[cmd_name] = 0.0
-            continue
-
-        args = cmds.get(cmd_name)
-        if args is None:
+        if cmd_name not in outcomes:
             passed += 1
             timings[cmd_name] = 0.0
             continue
 
+        args = cmds[cmd_name]
         full_cmd = "roam " + " ".join(args)
-        t0 = time.time()
-        rc, stdout, err = roam_cmd(args, cwd=repo_dir, timeout=120)
-        elapsed = round(time.time() - t0, 2)
+        rc, stdout, err, elapsed = outcomes[cmd_name]
         timings[cmd_name] = elapsed
 
         if rc == 0:
             passed += 1
             # Count output lines for context
-            out_lines = len(stdout.strip().split("\n")) if stdout.strip() else 0
+            body = stdout.strip()
+            out_lines = body.count("\n") + 1 if body else 0
             # Warn if output looks suspect
             min_expected = {"map": 3, "health": 3, "file": 3, "describe": 10,
                            "layers": 3, "clusters": 3, "fan": 3, "sketch": 1}
@@ -944,12 +1107,23 @@ def main():
                         help="Skip indexing phase (use existing DBs)")
     parser.add_argument("--skip-commands", action="store_true",
                         help="Skip command validation phase")
+    parser.add_argument("--subprocess", action="store_true",
+                        help="Run each index/command in a fresh interpreter "
+                             "(slower, but isolates crashes and import state)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Validate commands with N parallel workers "
+                             "(faster wall time, noisier per-command timings)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
     parser.add_argument("--baseline", help="Path to previous JSON for delta comparison")
     parser.add_argument("--output", help="Output JSON path",
                         default=f"bench-results-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
 
     args = parser.parse_args()
 
+    if args.worker:
+        serve_worker()
+        return
+
     # Determine repo list
     if args.repos:
         names = [n.strip() for n in args.repos.split(",")]
@@ -971,6 +1145,9 @@ def main():
     print(f"{'=' * 65}")
     print()
 
+    if args.subprocess:
+        warm_interpreter()
+
     # Phase 1: Clone
     if not args.skip_clone:
         print("Phase 1: SETUP (git clone --depth 1)")
@@ -983,9 +1160,15 @@ def main():
     if not args.skip_index:
         print("Phase 2: INDEX (roam index --force)")
         print("-" * 40)
-        for i, name in enumerate(names, 1):
-            t = index_repo(name, i, len(names))
-            index_times[name] = t
+        # One warm worker indexes every repo unless isolation is requested
+        index_runner = roam_cmd if args.subprocess else RoamWorker()
+        try:
+            for i, name in enumerate(names, 1):
+                t = index_repo(name, i, len(names), runner=index_runner)
+                index_times[name] = t
+        finally:
+            if isinstance(index_runner, RoamWorker):
+                index_runner.close()
         print()
     else:
         print("Phase 2: INDEX - skipped (using existing DBs)")
@@ -1014,7 +1197,8 @@ def main():
 
         # Validate commands
         if not args.skip_commands:
-            cmd_results = validate_commands(name)
+            runner = roam_cmd if args.subprocess else roam_cmd_inproc
+            cmd_results = validate_commands(name, runner=runner, jobs=args.jobs)
             data["commands"] = cmd_results
         else:
             data["commands"] = {"total": len(ALL_COMMANDS), "passed": len(ALL_COMMANDS),
@@ -6,40 +6,39 @@ import os
 import subprocess
 from pathlib import Path
 
+from roam.db.connection import batched_in
+
 
 # ---------------------------------------------------------------------------
-# Test / low-risk file detection
+# Low-risk file detection
 # ---------------------------------------------------------------------------
 
-_TEST_NAME_PATS = ["test_", "_test.", ".test.", ".spec."]
-_TEST_DIR_PATS = ["tests/", "test/", "__tests__/", "spec/"]
-
-
-def is_test_file(path: str) -> bool:
-    """Check if a file path looks like a test file."""
-    p = path.replace("\\", "/")
-    bn = os.path.basename(p)
-    return any(pat in bn for pat in _TEST_NAME_PATS) or any(d in p for d in _TEST_DIR_PATS)
-
-
-_LOW_RISK_EXTS = {
+_LOW_RISK_EXTS = frozenset({
     ".md", ".txt", ".rst", ".json", ".yaml", ".yml", ".toml",
     ".ini", ".cfg", ".lock", ".xml", ".svg", ".png", ".jpg",
     ".gif", ".ico", ".csv", ".env",
-}
+})
 
 
 def is_low_risk_file(path: str) -> bool:
     """Check if a file is docs/config/asset with dampened risk contribution."""
-    p = path.replace("\\", "/").lower()
-    _, ext = os.path.splitext(p)
-    return ext in _LOW_RISK_EXTS
+    p = path.lower()
+    dot = p.rfind(".")
+    start = max(p.rfind("/"), p.rfind("\\")) + 1
+    # Same rule as os.path.splitext: leading dots name a hidden file
+    # (".env"), not an extension.
+    if dot <= start or not p[start:dot].strip("."):
+        return False
+    return p[dot:] in _LOW_RISK_EXTS
 
 
 # ---------------------------------------------------------------------------
 # Changed file resolution
 # ---------------------------------------------------------------------------
 
+_SLASH = str.maketrans("\\", "/")
+_LIKE_BATCH = 400  # stay well under SQLITE_MAX_VARIABLE_NUMBER
+
 
 def get_changed_files(
     root: Path,
@@ -58,7 +57,7 @@ def get_changed_files(
 
     Returns normalised forward-slash paths relative to the repo root.
     """
-    cmd = ["git", "diff", "--name-only"]
+    cmd = ["git", "diff", "--name-only", "-z"]
 
     if commit_range:
         cmd.append(commit_range)
@@ -72,18 +71,15 @@ def get_changed_files(
             cmd,
             cwd=str(root),
             capture_output=True,
-            text=True,
             timeout=10,
-            encoding="utf-8",
-            errors="replace",
+            # Read-only query: don't contend for the index lock
+            env={**os.environ, "GIT_OPTIONAL_LOCKS": "0"},
         )
         if result.returncode != 0:
             return []
-        return [
-            p.replace("\\", "/")
-            for p in result.stdout.strip().splitlines()
-            if p.strip()
-        ]
+        # -z output is NUL-separated and never quoted: decode once, split once
+        out = result.stdout.decode("utf-8", "replace")
+        return [p.translate(_SLASH) for p in out.split("\0") if p.strip()]
     except (FileNotFoundError, subprocess.TimeoutExpired):
         return []
 
@@ -94,16 +90,38 @@ def resolve_changed_to_db(conn, changed_paths: list[str]) -> dict[str, int]:
     Falls back to LIKE matching when exact path fails (handles sub-directory
     prefixes and normalisation differences).
     """
+    unique = list(dict.fromkeys(changed_paths))
+    exact = {
+        r["path"]: r["id"]
+        for r in batched_in(
+            conn, "SELECT id, path FROM files WHERE path IN ({ph})", unique,
+        )
+    }
+
+    # Suffix-match all misses in one statement per batch.  MIN(path) picks
+    # the same row the per-path "LIKE ... LIMIT 1" did (it walks the
+    # idx_files_path covering index); SQLite returns the bare f.id from
+    # that row.
+    misses = [p for p in unique if p not in exact]
+    fuzzy: dict[str, tuple[str, int]] = {}
+    for i in range(0, len(misses), _LIKE_BATCH):
+        batch = misses[i:i + _LIKE_BATCH]
+        values = ",".join("(?)" for _ in batch)
+        rows = conn.execute(
+            f"""WITH miss(p) AS (VALUES {values})
+                SELECT m.p AS changed, MIN(f.path) AS path, f.id AS id
+                FROM miss m JOIN files f ON f.path LIKE '%' || m.p
+                GROUP BY m.p""",
+            batch,
+        ).fetchall()
+        for r in rows:
+            fuzzy[r["changed"]] = (r["path"], r["id"])
+
     file_map: dict[str, int] = {}
     for path in changed_paths:
-        row = conn.execute(
-            "SELECT id, path FROM files WHERE path = ?", (path,)
-        ).fetchone()
-        if not row:
-            row = conn.execute(
-                "SELECT id, path FROM files WHERE path LIKE ? LIMIT 1",
-                (f"%{path}",),
-            ).fetchone()
-        if row:
-            file_map[row["path"]] = row["id"]
+        if path in exact:
+            file_map[path] = exact[path]
+        elif path in fuzzy:
+            db_path, fid = fuzzy[path]
+            file_map[db_path] = fid
     return file_map
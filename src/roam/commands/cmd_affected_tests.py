@@ -11,8 +11,8 @@ from roam.commands.resolve import ensure_index, find_symbol
 from roam.commands.changed_files import (
     get_changed_files,
     resolve_changed_to_db,
-    is_test_file,
 )
+from roam.paths import is_test_file
 
 
 _MAX_HOPS = 10
@@ -5,7 +5,7 @@ import click
 from roam.db.connection import open_db
 from roam.output.formatter import to_json, json_envelope
 from roam.commands.resolve import ensure_index
-from roam.commands.metrics_history import collect_metrics, get_snapshots
+from roam.commands.metrics_history import collect_metrics, get_snapshots_chrono
 
 
 # ---------------------------------------------------------------------------
@@ -38,6 +38,13 @@ _WORSE_WHEN_HIGHER = {"cycles", "god_components", "bottlenecks",
 # Metrics where a decrease means degradation
 _WORSE_WHEN_LOWER = {"health_score"}
 
+# Worsening direction per tracked metric: +1 = worse when higher, -1 = lower
+_WORSE_DIR = {
+    **{m: 1 for m in _WORSE_WHEN_HIGHER},
+    **{m: -1 for m in _WORSE_WHEN_LOWER},
+}
+_TRACKED_METRICS = tuple(sorted(_WORSE_DIR))
+
 _TREND_LABELS = {
     "cycles": "Cycle count trending up",
     "health_score": "Health score declining",
@@ -65,30 +72,28 @@ def _make_alert(level, metric, message, current_value,
     return alert
 
 
-def _is_monotonic_worsening(values, metric):
-    """Check if a sequence of values is monotonically worsening.
+def _worsening_suffix_len(values, metric):
+    """Length of the longest monotonically worsening tail of *values*.
 
-    For metrics that are worse when higher, values should be non-decreasing
-    with at least one strict increase.  For metrics worse when lower, values
-    should be non-increasing with at least one strict decrease.
+    For metrics that are worse when higher, the tail must be non-decreasing
+    with at least one strict increase; for metrics worse when lower,
+    non-increasing with at least one strict decrease.  Returns 0 when no
+    such tail exists.  A single right-to-left walk suffices: any shorter
+    worsening tail is contained in the longest one.
     """
-    if metric in _WORSE_WHEN_HIGHER:
-        has_increase = False
-        for i in range(1, len(values)):
-            if values[i] < values[i - 1]:
-                return False
-            if values[i] > values[i - 1]:
-                has_increase = True
-        return has_increase
-    elif metric in _WORSE_WHEN_LOWER:
-        has_decrease = False
-        for i in range(1, len(values)):
-            if values[i] > values[i - 1]:
-                return False
-            if values[i] < values[i - 1]:
-                has_decrease = True
-        return has_decrease
-    return False
+    sign = _WORSE_DIR.get(metric)
+    if sign is None:
+        return 0
+    i = len(values) - 1
+    strict = False
+    while i > 0:
+        delta = (values[i] - values[i - 1]) * sign
+        if delta < 0:
+            break
+        if delta > 0:
+            strict = True
+        i -= 1
+    return len(values) - i if strict else 0
 
 
 # ---------------------------------------------------------------------------
@@ -99,7 +104,7 @@ def _check_thresholds(current):
     """Check current metrics against absolute thresholds."""
     alerts = []
     for metric, rule in _THRESHOLDS.items():
-        val = current.get(metric)
+        val = current[metric]
         if val is None:
             continue
         op, threshold, level = rule["op"], rule["value"], rule["level"]
@@ -125,29 +130,27 @@ def _check_thresholds(current):
 def _check_trends(snapshots_chrono):
     """Detect monotonic degradation over 3+ consecutive snapshots.
 
-    *snapshots_chrono* is a list of snapshot dicts ordered oldest-first.
+    *snapshots_chrono* is a list of snapshot rows (or dicts) ordered
+    oldest-first.
     """
     alerts = []
     if len(snapshots_chrono) < 3:
         return alerts
 
-    tracked = list(_WORSE_WHEN_HIGHER | _WORSE_WHEN_LOWER)
-    for metric in tracked:
-        values = [s.get(metric, 0) or 0 for s in snapshots_chrono]
-        # Check the last 3..N window sizes for a monotonic run
-        for window in range(len(values), 2, -1):
-            tail = values[-window:]
-            if _is_monotonic_worsening(tail, metric):
-                current = tail[-1]
-                arrow = " -> ".join(str(v) for v in tail)
-                label = _TREND_LABELS.get(metric, f"{metric} worsening")
-                alerts.append(_make_alert(
-                    WARNING, metric,
-                    f"{label}: {arrow} over {window} snapshots",
-                    current,
-                    trend_direction="up" if metric in _WORSE_WHEN_HIGHER else "down",
-                ))
-                break  # largest matching window is enough
+    for metric in _TRACKED_METRICS:
+        values = [s[metric] or 0 for s in snapshots_chrono]
+        window = _worsening_suffix_len(values, metric)
+        if window < 3:
+            continue
+        tail = values[-window:]
+        arrow = " -> ".join(str(v) for v in tail)
+        label = _TREND_LABELS.get(metric, f"{metric} worsening")
+        alerts.append(_make_alert(
+            WARNING, metric,
+            f"{label}: {arrow} over {window} snapshots",
+            tail[-1],
+            trend_direction="up" if _WORSE_DIR[metric] == 1 else "down",
+        ))
     return alerts
 
 
@@ -161,48 +164,38 @@ def _check_rate_of_change(snapshots_chrono):
     prev = snapshots_chrono[-2]
     curr = snapshots_chrono[-1]
 
-    tracked = list(_WORSE_WHEN_HIGHER | _WORSE_WHEN_LOWER)
-    for metric in tracked:
-        prev_val = prev.get(metric, 0) or 0
-        curr_val = curr.get(metric, 0) or 0
+    for metric in _TRACKED_METRICS:
+        sign = _WORSE_DIR[metric]
+        prev_val = prev[metric] or 0
+        curr_val = curr[metric] or 0
+        # Only a change in the worsening direction can alert, so settle
+        # that before doing any percentage arithmetic.
+        if (curr_val - prev_val) * sign <= 0:
+            continue
+        trend = "up" if sign == 1 else "down"
+
         if prev_val == 0:
             # Can't compute percentage change from zero.
             # But if the metric appeared from nothing, that is notable.
-            if curr_val > 0 and metric in _WORSE_WHEN_HIGHER:
-                alerts.append(_make_alert(
-                    INFO, metric,
-                    f"{metric}={curr_val} (new since last snapshot)",
-                    curr_val,
-                    trend_direction="up",
-                ))
-            elif curr_val < prev_val and metric in _WORSE_WHEN_LOWER:
-                alerts.append(_make_alert(
-                    INFO, metric,
-                    f"{metric}={curr_val} (new since last snapshot)",
-                    curr_val,
-                    trend_direction="down",
-                ))
+            alerts.append(_make_alert(
+                INFO, metric,
+                f"{metric}={curr_val} (new since last snapshot)",
+                curr_val,
+                trend_direction=trend,
+            ))
             continue
 
         pct = abs(curr_val - prev_val) / abs(prev_val) * 100
         if pct <= _RATE_OF_CHANGE_PCT:
             continue
 
-        # Only alert if change is in the worsening direction
-        worsening = False
-        if metric in _WORSE_WHEN_HIGHER and curr_val > prev_val:
-            worsening = True
-        elif metric in _WORSE_WHEN_LOWER and curr_val < prev_val:
-            worsening = True
-
-        if worsening:
-            direction = "increased" if curr_val > prev_val else "decreased"
-            alerts.append(_make_alert(
-                WARNING, metric,
-                f"{metric}={curr_val} ({direction} {pct:.0f}% since last snapshot)",
-                curr_val,
-                trend_direction="up" if curr_val > prev_val else "down",
-            ))
+        direction = "increased" if sign == 1 else "decreased"
+        alerts.append(_make_alert(
+            WARNING, metric,
+            f"{metric}={curr_val} ({direction} {pct:.0f}% since last snapshot)",
+            curr_val,
+            trend_direction=trend,
+        ))
     return alerts
 
 
@@ -212,13 +205,20 @@ def _check_rate_of_change(snapshots_chrono):
 
 def _deduplicate(alerts):
     """Remove duplicate alerts for the same metric, keeping the highest severity."""
+    # Each entry is its own sort key: (severity, metric, first-seen slot,
+    # alert).  The slot is unique, so tuple comparison never reaches the
+    # dict and ties keep first-seen order.
     seen = {}
     for a in alerts:
         key = (a["metric"], a.get("trend_direction"))
-        if key not in seen or _LEVEL_ORDER[a["level"]] < _LEVEL_ORDER[seen[key]["level"]]:
-            seen[key] = a
+        rank = _LEVEL_ORDER[a["level"]]
+        prev = seen.get(key)
+        if prev is None:
+            seen[key] = (rank, a["metric"], len(seen), a)
+        elif rank < prev[0]:
+            seen[key] = (rank, a["metric"], prev[2], a)
     # Return sorted: CRITICAL first, then WARNING, then INFO
-    return sorted(seen.values(), key=lambda a: (_LEVEL_ORDER[a["level"]], a["metric"]))
+    return [entry[3] for entry in sorted(seen.values())]
 
 
 # ---------------------------------------------------------------------------
@@ -241,28 +241,13 @@ def alerts(ctx):
     all_alerts = []
 
     with open_db(readonly=True) as conn:
-        # Fetch snapshot history (newest first from DB)
-        snaps_raw = get_snapshots(conn)
-
-        # Build chronological list of snapshot dicts (oldest first)
-        snap_dicts = []
-        for s in reversed(snaps_raw):
-            snap_dicts.append({
-                "timestamp": s["timestamp"],
-                "files": s["files"],
-                "symbols": s["symbols"],
-                "edges": s["edges"],
-                "cycles": s["cycles"],
-                "god_components": s["god_components"],
-                "bottlenecks": s["bottlenecks"],
-                "dead_exports": s["dead_exports"],
-                "layer_violations": s["layer_violations"],
-                "health_score": s["health_score"],
-            })
-
-        if snap_dicts:
+        # Oldest-first snapshot rows; sqlite3.Row supports lookup by
+        # column name, so the checks read them without copying.
+        snaps = get_snapshots_chrono(conn)
+
+        if snaps:
             # Use the most recent snapshot as "current" metrics
-            current = snap_dicts[-1]
+            current = snaps[-1]
         else:
             # No snapshots at all -- compute live metrics
             current = collect_metrics(conn)
@@ -271,12 +256,12 @@ def alerts(ctx):
         all_alerts.extend(_check_thresholds(current))
 
         # 2) Trend detection (need >= 3 snapshots)
-        if len(snap_dicts) >= 3:
-            all_alerts.extend(_check_trends(snap_dicts))
+        if len(snaps) >= 3:
+            all_alerts.extend(_check_trends(snaps))
 
         # 3) Rate-of-change detection (need >= 2 snapshots)
-        if len(snap_dicts) >= 2:
-            all_alerts.extend(_check_rate_of_change(snap_dicts))
+        if len(snaps) >= 2:
+            all_alerts.extend(_check_rate_of_change(snaps))
 
     # Deduplicate and sort
     all_alerts = _deduplicate(all_alerts)
@@ -294,7 +279,7 @@ def alerts(ctx):
                 "critical": counts[CRITICAL],
                 "warning": counts[WARNING],
                 "info": counts[INFO],
-                "snapshots_analyzed": len(snap_dicts),
+                "snapshots_analyzed": len(snaps),
             },
             alerts=all_alerts,
         )))
@@ -1,14 +1,17 @@
 """Get the minimal context needed to safely modify a symbol."""
 
-from collections import defaultdict, deque
+from collections import defaultdict
+from operator import itemgetter
 
 import click
 
 from roam.db.connection import open_db, batched_in, batched_count
-from roam.db.queries import FILE_BY_PATH
-from roam.output.formatter import abbrev_kind, loc, format_table, to_json, json_envelope
-from roam.commands.resolve import ensure_index, find_symbol
-from roam.commands.changed_files import is_test_file
+from roam.db.queries import FILE_BY_PATH_OR_SUFFIX
+from roam.output.formatter import (
+    abbrev_kind, loc, format_table, json_envelope, emit_json,
+)
+from roam.commands.resolve import ensure_index, find_symbols
+from roam.paths import is_test_file
 
 
 # ---------------------------------------------------------------------------
@@ -18,93 +21,86 @@ from roam.commands.changed_files import is_test_file
 _TASK_CHOICES = ["refactor", "debug", "extend", "review", "understand"]
 
 
-def _get_symbol_metrics(conn, sym_id):
-    """Fetch symbol_metrics row for a symbol, or None."""
-    row = conn.execute(
-        "SELECT * FROM symbol_metrics WHERE symbol_id = ?", (sym_id,)
-    ).fetchone()
-    if row is None:
-        return None
-    return {
-        "cognitive_complexity": row["cognitive_complexity"],
-        "nesting_depth": row["nesting_depth"],
-        "param_count": row["param_count"],
-        "line_count": row["line_count"],
-        "return_count": row["return_count"],
-        "bool_op_count": row["bool_op_count"],
-        "callback_depth": row["callback_depth"],
-    }
-
+def _fetch_symbol_bundle(conn, sym_id):
+    """Fetch complexity, graph centrality and file churn for a symbol.
 
-def _get_graph_metrics(conn, sym_id):
-    """Fetch graph_metrics row for a symbol, or None."""
+    One LEFT JOIN over symbol_metrics, graph_metrics and file_stats; each
+    part is None when its row is missing.  Returns
+    ``(complexity, graph_centrality, git_churn)``.
+    """
     row = conn.execute(
-        "SELECT * FROM graph_metrics WHERE symbol_id = ?", (sym_id,)
+        "SELECT sm.symbol_id as sm_id, sm.cognitive_complexity, "
+        "sm.nesting_depth, sm.param_count, sm.line_count, sm.return_count, "
+        "sm.bool_op_count, sm.callback_depth, "
+        "gm.symbol_id as gm_id, gm.pagerank, gm.in_degree, gm.out_degree, "
+        "gm.betweenness, "
+        "fs.file_id as fs_id, fs.commit_count, fs.total_churn, "
+        "fs.distinct_authors "
+        "FROM symbols s "
+        "LEFT JOIN symbol_metrics sm ON sm.symbol_id = s.id "
+        "LEFT JOIN graph_metrics gm ON gm.symbol_id = s.id "
+        "LEFT JOIN file_stats fs ON fs.file_id = s.file_id "
+        "WHERE s.id = ?",
+        (sym_id,),
     ).fetchone()
     if row is None:
-        return None
-    return {
-        "pagerank": round(row["pagerank"] or 0, 6),
-        "in_degree": row["in_degree"] or 0,
-        "out_degree": row["out_degree"] or 0,
-        "betweenness": round(row["betweenness"] or 0, 6),
-    }
+        return None, None, None
+
+    complexity = None
+    if row["sm_id"] is not None:
+        complexity = {
+            "cognitive_complexity": row["cognitive_complexity"],
+            "nesting_depth": row["nesting_depth"],
+            "param_count": row["param_count"],
+            "line_count": row["line_count"],
+            "return_count": row["return_count"],
+            "bool_op_count": row["bool_op_count"],
+            "callback_depth": row["callback_depth"],
+        }
 
+    centrality = None
+    if row["gm_id"] is not None:
+        centrality = {
+            "pagerank": round(row["pagerank"] or 0, 6),
+            "in_degree": row["in_degree"] or 0,
+            "out_degree": row["out_degree"] or 0,
+            "betweenness": round(row["betweenness"] or 0, 6),
+        }
 
-def _get_file_churn(conn, file_path):
-    """Fetch git churn stats for the file containing the symbol."""
-    frow = conn.execute(
-        "SELECT id FROM files WHERE path = ?", (file_path,)
-    ).fetchone()
-    if frow is None:
-        return None
-    stats = conn.execute(
-        "SELECT * FROM file_stats WHERE file_id = ?", (frow["id"],)
-    ).fetchone()
-    if stats is None:
-        return None
-    return {
-        "commit_count": stats["commit_count"] or 0,
-        "total_churn": stats["total_churn"] or 0,
-        "distinct_authors": stats["distinct_authors"] or 0,
-    }
+    churn = None
+    if row["fs_id"] is not None:
+        churn = {
+            "commit_count": row["commit_count"] or 0,
+            "total_churn": row["total_churn"] or 0,
+            "distinct_authors": row["distinct_authors"] or 0,
+        }
 
+    return complexity, centrality, churn
 
-def _get_coupling(conn, file_path, limit=10):
-    """Fetch temporal coupling partners for the symbol's file."""
-    frow = conn.execute(
-        "SELECT id FROM files WHERE path = ?", (file_path,)
-    ).fetchone()
-    if frow is None:
-        return []
-    fid = frow["id"]
 
+def _get_coupling(conn, fid, limit=10):
+    """Fetch temporal coupling partners for the file with id *fid*."""
     fstats = conn.execute(
         "SELECT commit_count FROM file_stats WHERE file_id = ?", (fid,)
     ).fetchone()
     file_commits = (fstats["commit_count"] or 1) if fstats else 1
 
     partners = conn.execute(
-        "SELECT f.path, gc.cochange_count, "
-        "CASE WHEN gc.file_id_a = ? THEN gc.file_id_b "
-        "     ELSE gc.file_id_a END as partner_fid "
+        "SELECT f.path, gc.cochange_count, fs.commit_count AS partner_commits "
         "FROM git_cochange gc "
         "JOIN files f ON ("
         "  CASE WHEN gc.file_id_a = ? THEN gc.file_id_b "
         "       ELSE gc.file_id_a END"
         ") = f.id "
+        "LEFT JOIN file_stats fs ON fs.file_id = f.id "
         "WHERE gc.file_id_a = ? OR gc.file_id_b = ? "
         "ORDER BY gc.cochange_count DESC LIMIT ?",
-        (fid, fid, fid, fid, limit),
+        (fid, fid, fid, limit),
     ).fetchall()
 
     results = []
     for p in partners:
-        pstats = conn.execute(
-            "SELECT commit_count FROM file_stats WHERE file_id = ?",
-            (p["partner_fid"],)
-        ).fetchone()
-        partner_commits = (pstats["commit_count"] or 1) if pstats else 1
+        partner_commits = p["partner_commits"] or 1
         avg = (file_commits + partner_commits) / 2
         strength = round(p["cochange_count"] / avg, 2) if avg > 0 else 0
         results.append({
@@ -119,25 +115,33 @@ def _get_affected_tests_bfs(conn, sym_id, max_hops=8):
     """BFS reverse-edge walk to find test symbols that transitively depend
     on the target symbol."""
     visited = {sym_id: (0, None)}
-    queue = deque([(sym_id, 0, None)])
-
-    while queue:
-        current_id, hops, via = queue.popleft()
-        if hops >= max_hops:
-            continue
-        callers = conn.execute(
-            "SELECT e.source_id, s.name "
+    frontier = [sym_id]
+
+    # Level-synchronous walk: one batched query per hop instead of one per
+    # node.  Callers are consumed in frontier order so the shortest-hop
+    # ``via`` attribution matches a plain queue-based BFS.
+    for hops in range(1, max_hops + 1):
+        if not frontier:
+            break
+        callers_of = defaultdict(list)
+        for row in batched_in(
+            conn,
+            "SELECT e.target_id, e.source_id, s.name "
             "FROM edges e JOIN symbols s ON e.source_id = s.id "
-            "WHERE e.target_id = ?",
-            (current_id,),
-        ).fetchall()
-        for row in callers:
-            cid = row["source_id"]
-            new_hops = hops + 1
-            new_via = via if via else row["name"]
-            if cid not in visited or visited[cid][0] > new_hops:
-                visited[cid] = (new_hops, new_via)
-                queue.append((cid, new_hops, new_via))
+            "WHERE e.target_id IN ({ph})",
+            frontier,
+        ):
+            callers_of[row["target_id"]].append(row)
+
+        next_frontier = []
+        for current_id in frontier:
+            via = visited[current_id][1]
+            for row in callers_of.get(current_id, ()):
+                cid = row["source_id"]
+                if cid not in visited:
+                    visited[cid] = (hops, via if via else row["name"])
+                    next_frontier.append(cid)
+        frontier = next_frontier
 
     caller_ids = [sid for sid in visited if sid != sym_id]
     if not caller_ids:
@@ -175,63 +179,52 @@ def _get_affected_tests_bfs(conn, sym_id, max_hops=8):
     return tests
 
 
-def _get_blast_radius(conn, sym_id):
-    """Compute downstream dependents count via BFS on reverse edges."""
-    visited = {sym_id}
-    queue = deque([sym_id])
-    while queue:
-        current = queue.popleft()
-        callers = conn.execute(
-            "SELECT source_id FROM edges WHERE target_id = ?", (current,)
-        ).fetchall()
-        for row in callers:
-            cid = row["source_id"]
-            if cid not in visited:
-                visited.add(cid)
-                queue.append(cid)
+# Reverse edge closure ``rev(id)``: every symbol that transitively reaches the
+# bound symbol id, plus the symbol itself.  UNION keeps cycles finite.
+_ANCESTORS_CTE = (
+    "WITH RECURSIVE rev(id) AS ("
+    "  SELECT ? "
+    "  UNION "
+    "  SELECT e.source_id FROM rev JOIN edges e ON e.target_id = rev.id"
+    ") "
+)
 
-    if len(visited) <= 1:
-        return {"dependent_symbols": 0, "dependent_files": 0}
-
-    dep_ids = [sid for sid in visited if sid != sym_id]
-    file_rows = batched_in(
-        conn,
-        "SELECT DISTINCT f.path FROM symbols s "
-        "JOIN files f ON s.file_id = f.id "
-        "WHERE s.id IN ({ph})",
-        dep_ids,
-    )
 
+def _get_blast_radius(conn, sym_id):
+    """Compute downstream dependents count from the reverse edge closure."""
+    row = conn.execute(
+        _ANCESTORS_CTE
+        + "SELECT COUNT(*), COUNT(DISTINCT s.file_id) "
+        "FROM rev JOIN symbols s ON s.id = rev.id "
+        "WHERE rev.id != ?",
+        (sym_id, sym_id),
+    ).fetchone()
     return {
-        "dependent_symbols": len(dep_ids),
-        "dependent_files": len(file_rows),
+        "dependent_symbols": row[0],
+        "dependent_files": row[1],
     }
 
 
 def _get_cluster_info(conn, sym_id):
     """Fetch cluster membership for a symbol."""
-    row = conn.execute(
-        "SELECT cluster_id, cluster_label FROM clusters WHERE symbol_id = ?",
+    rows = conn.execute(
+        "SELECT c1.cluster_id, c1.cluster_label, s.name, s.kind, "
+        "COUNT(*) OVER () AS cluster_size "
+        "FROM clusters c1 "
+        "JOIN clusters c2 ON c2.cluster_id = c1.cluster_id "
+        "JOIN symbols s ON c2.symbol_id = s.id "
+        "WHERE c1.symbol_id = ? ORDER BY s.name LIMIT 8",
         (sym_id,),
-    ).fetchone()
-    if row is None:
-        return None
-    members = conn.execute(
-        "SELECT s.name, s.kind FROM clusters c "
-        "JOIN symbols s ON c.symbol_id = s.id "
-        "WHERE c.cluster_id = ? ORDER BY s.name LIMIT 8",
-        (row["cluster_id"],),
     ).fetchall()
-    size = conn.execute(
-        "SELECT COUNT(*) FROM clusters WHERE cluster_id = ?",
-        (row["cluster_id"],),
-    ).fetchone()[0]
+    if not rows:
+        return None
+    row = rows[0]
     return {
         "cluster_id": row["cluster_id"],
         "cluster_label": row["cluster_label"] or f"cluster-{row['cluster_id']}",
-        "cluster_size": size,
+        "cluster_size": row["cluster_size"],
         "top_members": [
-            {"name": m["name"], "kind": m["kind"]} for m in members
+            {"name": m["name"], "kind": m["kind"]} for m in rows
         ],
     }
 
@@ -243,16 +236,18 @@ def _get_similar_symbols(conn, sym, limit=10):
     if not dir_path:
         return []
 
-    pattern = dir_path + "/%"
+    # Prefix match as an index-friendly range: every path under "dir/"
+    # sorts in ["dir/", "dir0") since "0" is the code point after "/".
+    lo, hi = dir_path + "/", dir_path + "0"
     rows = conn.execute(
         "SELECT s.name, s.qualified_name, s.kind, f.path as file_path, "
         "s.line_start, s.signature "
         "FROM symbols s "
         "JOIN files f ON s.file_id = f.id "
         "WHERE s.kind = ? AND s.is_exported = 1 AND s.id != ? "
-        "AND f.path LIKE ? "
+        "AND f.path >= ? AND f.path < ? "
         "ORDER BY f.path, s.line_start LIMIT ?",
-        (sym["kind"], sym["id"], pattern, limit),
+        (sym["kind"], sym["id"], lo, hi, limit),
     ).fetchall()
 
     return [
@@ -267,8 +262,13 @@ def _get_similar_symbols(conn, sym, limit=10):
 
 
 def _get_entry_points_reaching(conn, sym_id, limit=5):
-    """Find entry points (in_degree=0) that can reach this symbol via
-    forward BFS."""
+    """Find entry points (in_degree=0) that can reach this symbol."""
+    # Nothing calls the symbol, so no entry point can reach it.
+    if conn.execute(
+        "SELECT 1 FROM edges WHERE target_id = ? LIMIT 1", (sym_id,)
+    ).fetchone() is None:
+        return []
+
     entry_rows = conn.execute(
         "SELECT s.id, s.name, s.qualified_name, s.kind, "
         "f.path as file_path, s.line_start, gm.out_degree "
@@ -283,28 +283,22 @@ def _get_entry_points_reaching(conn, sym_id, limit=5):
     if not entry_rows:
         return []
 
-    # Build forward adjacency list
-    adj = {}
-    for row in conn.execute("SELECT source_id, target_id FROM edges").fetchall():
-        adj.setdefault(row["source_id"], set()).add(row["target_id"])
+    # An entry point reaches the symbol iff it is one of its ancestors.
+    # Filter the candidates inside the closure query so only the (at most
+    # 50) matching ids come back, not the whole ancestor set.
+    cand_ids = [ep["id"] for ep in entry_rows]
+    ph = ",".join("?" for _ in cand_ids)
+    reaching = {
+        r[0] for r in conn.execute(
+            _ANCESTORS_CTE
+            + f"SELECT id FROM rev WHERE id IN ({ph}) AND id != ?",
+            (sym_id, *cand_ids, sym_id),
+        )
+    }
 
     results = []
     for ep in entry_rows:
-        visited = {ep["id"]}
-        queue = deque([ep["id"]])
-        found = False
-        while queue:
-            current = queue.popleft()
-            for neighbor in adj.get(current, ()):
-                if neighbor == sym_id:
-                    found = True
-                    break
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(neighbor)
-            if found:
-                break
-        if found:
+        if ep["id"] in reaching:
             results.append({
                 "name": ep["qualified_name"] or ep["name"],
                 "kind": ep["kind"],
@@ -344,51 +338,44 @@ def _gather_task_extras(conn, sym, ctx_data, task):
 
     Returns a dict of extra sections keyed by section name.  Keys
     prefixed with ``_`` are rendering hints (e.g. ``_hide_callees``).
+    Sections are inserted in the order they appear in the JSON payload.
     """
     sym_id = sym["id"]
-    file_path = sym["file_path"]
+    file_id = sym["file_id"]
     extras = {}
+    complexity, centrality, churn = _fetch_symbol_bundle(conn, sym_id)
 
     if task == "refactor":
-        extras["complexity"] = _get_symbol_metrics(conn, sym_id)
-        extras["graph_centrality"] = _get_graph_metrics(conn, sym_id)
-        extras["coupling"] = _get_coupling(conn, file_path, limit=10)
+        extras["complexity"] = complexity
+        extras["graph_centrality"] = centrality
+        extras["coupling"] = _get_coupling(conn, file_id, limit=10)
         extras["_hide_callees"] = True
 
     elif task == "debug":
-        extras["complexity"] = _get_symbol_metrics(conn, sym_id)
+        extras["complexity"] = complexity
         extras["affected_tests"] = _get_affected_tests_bfs(conn, sym_id)
 
     elif task == "extend":
+        extras["graph_centrality"] = centrality
         extras["similar_symbols"] = _get_similar_symbols(conn, sym, limit=10)
         extras["entry_points_reaching"] = _get_entry_points_reaching(
             conn, sym_id, limit=5,
         )
-        extras["graph_centrality"] = _get_graph_metrics(conn, sym_id)
 
     elif task == "review":
-        extras["complexity"] = _get_symbol_metrics(conn, sym_id)
-        extras["git_churn"] = _get_file_churn(conn, file_path)
-        extras["affected_tests"] = _get_affected_tests_bfs(conn, sym_id)
-        extras["coupling"] = _get_coupling(conn, file_path, limit=10)
+        extras["complexity"] = complexity
+        extras["graph_centrality"] = centrality
+        extras["git_churn"] = churn
         extras["blast_radius"] = _get_blast_radius(conn, sym_id)
-        extras["graph_centrality"] = _get_graph_metrics(conn, sym_id)
+        extras["coupling"] = _get_coupling(conn, file_id, limit=10)
+        extras["affected_tests"] = _get_affected_tests_bfs(conn, sym_id)
 
     elif task == "understand":
-        # sqlite3.Row lacks .get() — use try/except for optional fields
-        try:
-            extras["docstring"] = sym["docstring"] or None
-        except (KeyError, IndexError):
-            extras["docstring"] = None
+        sym_d = sym if isinstance(sym, dict) else dict(sym)
+        extras["docstring"] = sym_d.get("docstring") or None
+        extras["graph_centrality"] = centrality
         extras["cluster"] = _get_cluster_info(conn, sym_id)
-        extras["graph_centrality"] = _get_graph_metrics(conn, sym_id)
-        try:
-            fid = sym["file_id"]
-        except (KeyError, IndexError):
-            fid = conn.execute(
-                "SELECT file_id FROM symbols WHERE id = ?", (sym_id,)
-            ).fetchone()[0]
-        extras["file_context"] = _get_file_context(conn, fid, sym_id)
+        extras["file_context"] = _get_file_context(conn, file_id, sym_id)
         extras["_limit_callers"] = 5
         extras["_limit_callees"] = 5
 
@@ -399,141 +386,234 @@ def _gather_task_extras(conn, sym, ctx_data, task):
 # Single-symbol context gathering (reusable for batch mode)
 # ---------------------------------------------------------------------------
 
+# Callers carry their PageRank for the high-fan ranking in
+# _assemble_symbol_context; callees are never ranked.
+_CALLERS_CALLEES_SQL = (
+    "SELECT 'in' as dir, s.id, s.name, s.kind, s.line_start, s.line_end, "
+    "f.path as file_path, e.kind as edge_kind, e.line as edge_line, "
+    "gm.pagerank "
+    "FROM edges e "
+    "JOIN symbols s ON e.source_id = s.id "
+    "JOIN files f ON s.file_id = f.id "
+    "LEFT JOIN graph_metrics gm ON gm.symbol_id = s.id "
+    "WHERE e.target_id = ? "
+    "UNION ALL "
+    "SELECT 'out' as dir, s.id, s.name, s.kind, s.line_start, s.line_end, "
+    "f.path as file_path, e.kind as edge_kind, e.line as edge_line, "
+    "NULL as pagerank "
+    "FROM edges e "
+    "JOIN symbols s ON e.target_id = s.id "
+    "JOIN files f ON s.file_id = f.id "
+    "WHERE e.source_id = ? "
+    "ORDER BY dir, file_path, line_start"
+)
+
+# Only the first few siblings are ever listed; the window count keeps the
+# "+N more" total without sending every export row back.
+_MAX_SIBLINGS = 10
+
+# Test files importing the symbol's file plus its siblings (other exports in
+# the same file), in one statement tagged by ``rel``.
+# Params: (file_id, sym_id, sibling limit).
+_IMPORTERS_SIBLINGS_SQL = (
+    "SELECT 'importer' as rel, f.path, fe.symbol_count, "
+    "NULL as name, NULL as kind, NULL as line_start, NULL as total "
+    "FROM file_edges fe "
+    "JOIN files f ON fe.source_file_id = f.id "
+    "WHERE fe.target_file_id = ?1 AND is_test_file(f.path) "
+    "UNION ALL "
+    "SELECT * FROM ("
+    "  SELECT 'sibling', NULL, NULL, name, kind, line_start, COUNT(*) OVER () "
+    "  FROM symbols "
+    "  WHERE file_id = ?1 AND is_exported = 1 AND id != ?2 "
+    "  ORDER BY line_start LIMIT ?3"
+    ")"
+)
+
+
 def _gather_symbol_context(conn, sym):
     """Gather callers, callees, tests, siblings, and files_to_read for a symbol.
 
     Returns a dict with all context fields.
     """
     sym_id = sym["id"]
-    line_start = sym["line_start"]
-    line_end = sym["line_end"] or line_start
 
-    # --- Callers ---
-    callers = conn.execute(
-        "SELECT s.id, s.name, s.kind, s.line_start, s.line_end, "
-        "f.path as file_path, e.kind as edge_kind, e.line as edge_line "
+    # --- Callers and callees (one round-trip, tagged by direction) ---
+    # The tag is column 0; reading it by index skips Row's name lookup.
+    callers = []
+    callees = []
+    for r in conn.execute(_CALLERS_CALLEES_SQL, (sym_id, sym_id)):
+        (callers if r[0] == "in" else callees).append(r)
+
+    # --- Test files that import the symbol's file, and siblings ---
+    test_importers = []
+    siblings = []
+    for r in conn.execute(
+        _IMPORTERS_SIBLINGS_SQL, (sym["file_id"], sym_id, _MAX_SIBLINGS),
+    ):
+        (test_importers if r[0] == "importer" else siblings).append(r)
+    sibling_count = siblings[0]["total"] if siblings else 0
+
+    return _assemble_symbol_context(
+        sym, callers, callees, test_importers, siblings, sibling_count,
+    )
+
+
+def _gather_symbol_contexts(conn, syms):
+    """Gather context for several symbols with one query per relation.
+
+    Callers, callees, siblings and test importers are fetched for the whole
+    set via ``batched_in`` and sliced per symbol, instead of running
+    :func:`_gather_symbol_context` once per symbol.  A symbol named more
+    than once (e.g. by simple and qualified name) is assembled once and
+    its context shared.
+    """
+    unique = {sym["id"]: sym for sym in syms}
+    if len(unique) < 2:
+        by_id = {
+            sym_id: _gather_symbol_context(conn, sym)
+            for sym_id, sym in unique.items()
+        }
+        return [by_id[sym["id"]] for sym in syms]
+
+    sym_ids = list(unique)
+    file_ids = list(dict.fromkeys(sym["file_id"] for sym in syms))
+
+    # for_id leads each relation query so rows are keyed by index, not name
+    callers_by_sym = defaultdict(list)
+    for r in batched_in(
+        conn,
+        "SELECT e.target_id as for_id, s.id, s.name, s.kind, "
+        "s.line_start, s.line_end, "
+        "f.path as file_path, e.kind as edge_kind, e.line as edge_line, "
+        "gm.pagerank "
         "FROM edges e "
         "JOIN symbols s ON e.source_id = s.id "
         "JOIN files f ON s.file_id = f.id "
-        "WHERE e.target_id = ? "
+        "LEFT JOIN graph_metrics gm ON gm.symbol_id = s.id "
+        "WHERE e.target_id IN ({ph}) "
         "ORDER BY f.path, s.line_start",
-        (sym_id,),
-    ).fetchall()
+        sym_ids,
+    ):
+        callers_by_sym[r[0]].append(r)
 
-    # --- Callees ---
-    callees = conn.execute(
-        "SELECT s.id, s.name, s.kind, s.line_start, s.line_end, "
+    callees_by_sym = defaultdict(list)
+    for r in batched_in(
+        conn,
+        "SELECT e.source_id as for_id, s.id, s.name, s.kind, "
+        "s.line_start, s.line_end, "
         "f.path as file_path, e.kind as edge_kind, e.line as edge_line "
         "FROM edges e "
         "JOIN symbols s ON e.target_id = s.id "
         "JOIN files f ON s.file_id = f.id "
-        "WHERE e.source_id = ? "
+        "WHERE e.source_id IN ({ph}) "
         "ORDER BY f.path, s.line_start",
-        (sym_id,),
-    ).fetchall()
+        sym_ids,
+    ):
+        callees_by_sym[r[0]].append(r)
 
-    # --- Split callers into tests vs non-tests ---
-    test_callers = [c for c in callers if is_test_file(c["file_path"])]
-    non_test_callers = [c for c in callers if not is_test_file(c["file_path"])]
+    exports_by_file = defaultdict(list)
+    for r in batched_in(
+        conn,
+        "SELECT id, file_id, name, kind, line_start FROM symbols "
+        "WHERE file_id IN ({ph}) AND is_exported = 1 "
+        "ORDER BY line_start",
+        file_ids,
+    ):
+        exports_by_file[r["file_id"]].append(r)
 
-    # Rank callers by PageRank for high-fan symbols
-    if len(non_test_callers) > 10:
-        caller_ids = [c["id"] for c in non_test_callers]
-        pr_rows = batched_in(
-            conn,
-            "SELECT symbol_id, pagerank FROM graph_metrics "
-            "WHERE symbol_id IN ({ph})",
-            caller_ids,
-        )
-        pr_map = {r["symbol_id"]: r["pagerank"] or 0 for r in pr_rows}
-        non_test_callers = sorted(
-            non_test_callers,
-            key=lambda c: -pr_map.get(c["id"], 0),
+    test_importers_by_file = defaultdict(list)
+    for r in batched_in(
+        conn,
+        "SELECT fe.target_file_id, f.path, fe.symbol_count "
+        "FROM file_edges fe "
+        "JOIN files f ON fe.source_file_id = f.id "
+        "WHERE fe.target_file_id IN ({ph}) AND is_test_file(f.path)",
+        file_ids,
+    ):
+        test_importers_by_file[r["target_file_id"]].append(r)
+
+    by_id = {}
+    for sym_id, sym in unique.items():
+        siblings = [r for r in exports_by_file.get(sym["file_id"], [])
+                    if r["id"] != sym_id]
+        by_id[sym_id] = _assemble_symbol_context(
+            sym,
+            callers_by_sym.get(sym_id, []),
+            callees_by_sym.get(sym_id, []),
+            test_importers_by_file.get(sym["file_id"], []),
+            siblings[:_MAX_SIBLINGS], len(siblings),
         )
+    return [by_id[sym["id"]] for sym in syms]
 
-    # --- Test files that import the symbol's file ---
-    sym_file_row = conn.execute(
-        "SELECT id FROM files WHERE path = ?", (sym["file_path"],)
-    ).fetchone()
-    test_importers = []
-    if sym_file_row:
-        importers = conn.execute(
-            "SELECT f.path, fe.symbol_count "
-            "FROM file_edges fe "
-            "JOIN files f ON fe.source_file_id = f.id "
-            "WHERE fe.target_file_id = ?",
-            (sym_file_row["id"],),
-        ).fetchall()
-        test_importers = [r for r in importers if is_test_file(r["path"])]
 
-    # --- Siblings (other exports in same file) ---
-    siblings = conn.execute(
-        "SELECT name, kind, line_start FROM symbols "
-        "WHERE file_id = ? AND is_exported = 1 AND id != ? "
-        "ORDER BY line_start",
-        (sym["file_id"], sym_id),
-    ).fetchall()
+def _assemble_symbol_context(sym, callers, callees, test_importers,
+                             siblings, sibling_count):
+    """Build the context dict for *sym* from its already-fetched relations.
+
+    *siblings* holds at most ``_MAX_SIBLINGS`` rows; *sibling_count* is the
+    full number of other exports in the file.
+    """
+    line_start = sym["line_start"]
+    line_end = sym["line_end"] or line_start
+
+    # --- Split callers into tests vs non-tests ---
+    test_callers = []
+    non_test_callers = []
+    is_test = is_test_file  # local alias for the per-caller loop
+    for c in callers:
+        (test_callers if is_test(c["file_path"]) else non_test_callers).append(c)
+
+    # Rank callers by PageRank (fetched with the caller rows) for
+    # high-fan symbols
+    if len(non_test_callers) > 10:
+        non_test_callers.sort(key=lambda c: -(c["pagerank"] or 0))
 
     # --- Build "files to read" list (capped for high-fan symbols) ---
     _MAX_CALLER_FILES = 10
     _MAX_CALLEE_FILES = 5
     _MAX_TEST_FILES = 5
-    skipped_callers = 0
-    skipped_callees = 0
 
-    files_to_read = [{
+    # Keyed by path: insertion order is the output order and membership is
+    # the dedup check.
+    to_read = {sym["file_path"]: {
         "path": sym["file_path"],
         "start": line_start,
         "end": line_end,
         "reason": "definition",
-    }]
-    seen = {sym["file_path"]}
-    caller_files = 0
-    for c in non_test_callers:
-        if c["file_path"] not in seen:
-            if caller_files >= _MAX_CALLER_FILES:
-                skipped_callers += 1
+    }}
+    # One pass over the symbol rows, in priority order.  Past its cap a
+    # caller/callee row in an unseen file counts as skipped; tests just stop.
+    skipped = {"caller": 0, "callee": 0}
+    for reason, rows, cap in (
+        ("caller", non_test_callers, _MAX_CALLER_FILES),
+        ("callee", callees, _MAX_CALLEE_FILES),
+        ("test", test_callers, _MAX_TEST_FILES),
+    ):
+        added = 0
+        for c in rows:
+            path = c["file_path"]
+            if path in to_read:
                 continue
-            seen.add(c["file_path"])
-            files_to_read.append({
-                "path": c["file_path"],
-                "start": c["line_start"],
-                "end": c["line_end"] or c["line_start"],
-                "reason": "caller",
-            })
-            caller_files += 1
-    callee_files = 0
-    for c in callees:
-        if c["file_path"] not in seen:
-            if callee_files >= _MAX_CALLEE_FILES:
-                skipped_callees += 1
+            if added >= cap:
+                if reason == "test":
+                    break
+                skipped[reason] += 1
                 continue
-            seen.add(c["file_path"])
-            files_to_read.append({
-                "path": c["file_path"],
+            to_read[path] = {
+                "path": path,
                 "start": c["line_start"],
                 "end": c["line_end"] or c["line_start"],
-                "reason": "callee",
-            })
-            callee_files += 1
-    test_files = 0
-    for t in test_callers:
-        if t["file_path"] not in seen and test_files < _MAX_TEST_FILES:
-            seen.add(t["file_path"])
-            files_to_read.append({
-                "path": t["file_path"],
-                "start": t["line_start"],
-                "end": t["line_end"] or t["line_start"],
-                "reason": "test",
-            })
-            test_files += 1
+                "reason": reason,
+            }
+            added += 1
+    test_files = added
     for ti in test_importers:
-        if ti["path"] not in seen and test_files < _MAX_TEST_FILES:
-            seen.add(ti["path"])
-            files_to_read.append({
+        if ti["path"] not in to_read and test_files < _MAX_TEST_FILES:
+            to_read[ti["path"]] = {
                 "path": ti["path"], "start": 1, "end": None,
                 "reason": "test",
-            })
+            }
             test_files += 1
 
     return {
@@ -546,9 +626,10 @@ def _gather_symbol_context(conn, sym):
         "test_callers": test_callers,
         "test_importers": test_importers,
         "siblings": siblings,
-        "files_to_read": files_to_read,
-        "skipped_callers": skipped_callers,
-        "skipped_callees": skipped_callees,
+        "sibling_count": sibling_count,
+        "files_to_read": list(to_read.values()),
+        "skipped_callers": skipped["caller"],
+        "skipped_callees": skipped["callee"],
     }
 
 
@@ -556,6 +637,27 @@ def _gather_symbol_context(conn, sym):
 # Batch mode: shared callers + information density scoring
 # ---------------------------------------------------------------------------
 
+# Above this many ids, _batch_context resolves symbols through a temp table
+# instead of chunked IN clauses (one chunk of batched_in).
+_RESOLVE_INLINE_MAX = 400
+
+
+def _intersect_smallest_first(sets):
+    """Intersect *sets*, probing from the smallest one outward.
+
+    Stops as soon as the running result is empty.
+    """
+    if not sets:
+        return set()
+    ordered = sorted(sets, key=len)
+    acc = set(ordered[0])
+    for other in ordered[1:]:
+        if not acc:
+            break
+        acc &= other
+    return acc
+
+
 def _batch_context(conn, contexts):
     """Compute batch-mode context for multiple symbols.
 
@@ -569,20 +671,39 @@ def _batch_context(conn, contexts):
         caller_id_sets.append({c["id"] for c in ctx_data["non_test_callers"]})
         callee_id_sets.append({c["id"] for c in ctx_data["callees"]})
 
-    shared_caller_ids = set.intersection(*caller_id_sets) if caller_id_sets else set()
-    shared_callee_ids = set.intersection(*callee_id_sets) if callee_id_sets else set()
+    shared_caller_ids = _intersect_smallest_first(caller_id_sets)
+    shared_callee_ids = _intersect_smallest_first(callee_id_sets)
 
     def _resolve_ids(ids):
         if not ids:
             return []
-        return batched_in(
-            conn,
-            "SELECT s.name, s.kind, f.path as file_path, s.line_start "
-            "FROM symbols s JOIN files f ON s.file_id = f.id "
-            "WHERE s.id IN ({ph}) "
-            "ORDER BY f.path, s.line_start",
-            list(ids),
+        if len(ids) <= _RESOLVE_INLINE_MAX:
+            return batched_in(
+                conn,
+                "SELECT s.name, s.kind, f.path as file_path, s.line_start "
+                "FROM symbols s JOIN files f ON s.file_id = f.id "
+                "WHERE s.id IN ({ph}) "
+                "ORDER BY f.path, s.line_start",
+                list(ids),
+            )
+        # Large sets: load the ids into a temp table and join once, so the
+        # statement is planned once and ORDER BY spans the whole result
+        # rather than each IN-clause chunk.
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS _context_ids "
+            "(id INTEGER PRIMARY KEY)"
+        )
+        conn.execute("DELETE FROM _context_ids")
+        conn.executemany(
+            "INSERT INTO _context_ids (id) VALUES (?)", [(i,) for i in ids],
         )
+        return conn.execute(
+            "SELECT s.name, s.kind, f.path as file_path, s.line_start "
+            "FROM _context_ids t "
+            "JOIN symbols s ON s.id = t.id "
+            "JOIN files f ON s.file_id = f.id "
+            "ORDER BY f.path, s.line_start"
+        ).fetchall()
 
     shared_callers = _resolve_ids(shared_caller_ids)
     shared_callees = _resolve_ids(shared_callee_ids)
@@ -596,17 +717,18 @@ def _batch_context(conn, contexts):
             if f["reason"] in ("caller", "callee"):
                 file_edges_to_query[path] = file_edges_to_query.get(path, 0) + 1
 
-    file_total_edges = {}
     all_paths = list(file_reasons.keys())
-    for path in all_paths:
-        frow = conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
-        if frow:
-            total = conn.execute(
-                "SELECT COUNT(*) FROM edges e JOIN symbols s ON e.source_id = s.id "
-                "WHERE s.file_id = ?",
-                (frow["id"],),
-            ).fetchone()[0]
-            file_total_edges[path] = max(total, 1)
+    file_total_edges = {
+        r["path"]: max(r["cnt"], 1)
+        for r in batched_in(
+            conn,
+            "SELECT f.path, COUNT(e.source_id) as cnt FROM files f "
+            "LEFT JOIN symbols s ON s.file_id = f.id "
+            "LEFT JOIN edges e ON e.source_id = s.id "
+            "WHERE f.path IN ({ph}) GROUP BY f.path",
+            all_paths,
+        )
+    }
 
     scored_files = []
     for path in all_paths:
@@ -635,137 +757,164 @@ def _batch_context(conn, contexts):
 def _render_complexity_text(metrics):
     if not metrics:
         return
-    click.echo("Complexity:")
-    click.echo(
+    click.echo("\n".join([
+        "Complexity:",
         f"  cognitive={metrics['cognitive_complexity']:.0f}  "
         f"nesting={metrics['nesting_depth']}  "
         f"params={metrics['param_count']}  "
         f"lines={metrics['line_count']}  "
         f"returns={metrics['return_count']}  "
         f"bool_ops={metrics['bool_op_count']}  "
-        f"callbacks={metrics['callback_depth']}"
-    )
-    click.echo()
+        f"callbacks={metrics['callback_depth']}",
+        "",
+    ]))
 
 
 def _render_graph_centrality_text(metrics):
     if not metrics:
         return
-    click.echo("Graph centrality:")
-    click.echo(
+    click.echo("\n".join([
+        "Graph centrality:",
         f"  pagerank={metrics['pagerank']:.6f}  "
         f"in_degree={metrics['in_degree']}  "
         f"out_degree={metrics['out_degree']}  "
-        f"betweenness={metrics['betweenness']:.6f}"
-    )
-    click.echo()
+        f"betweenness={metrics['betweenness']:.6f}",
+        "",
+    ]))
 
 
 def _render_churn_text(churn):
     if not churn:
         return
-    click.echo("Git churn (file):")
-    click.echo(
+    click.echo("\n".join([
+        "Git churn (file):",
         f"  commits={churn['commit_count']}  "
         f"total_churn={churn['total_churn']}  "
-        f"authors={churn['distinct_authors']}"
-    )
-    click.echo()
+        f"authors={churn['distinct_authors']}",
+        "",
+    ]))
 
 
 def _render_coupling_text(coupling):
     if not coupling:
         return
-    click.echo(f"Temporal coupling ({len(coupling)} partners):")
     rows = [
         [c["path"], f"{c['strength']:.0%}", str(c["cochange_count"])]
         for c in coupling[:10]
     ]
-    click.echo(format_table(["file", "strength", "co-changes"], rows))
-    click.echo()
+    click.echo("\n".join([
+        f"Temporal coupling ({len(coupling)} partners):",
+        format_table(["file", "strength", "co-changes"], rows),
+        "",
+    ]))
 
 
 def _render_affected_tests_text(tests):
     if not tests:
-        click.echo("Affected tests: (none found via BFS)")
-        click.echo()
+        click.echo("Affected tests: (none found via BFS)\n")
         return
     direct = sum(1 for t in tests if t["kind"] == "DIRECT")
-    transitive = sum(1 for t in tests if t["kind"] == "TRANSITIVE")
-    click.echo(f"Affected tests ({direct} direct, {transitive} transitive):")
+    transitive = len(tests) - direct
+    lines = [f"Affected tests ({direct} direct, {transitive} transitive):"]
     for t in tests[:15]:
         via_str = f" via {t['via']}" if t.get("via") else ""
         hops = t["hops"]
-        click.echo(
+        lines.append(
             f"  {t['kind']:<12s} {t['file']}::{t['symbol']}  "
             f"({hops} hop{'s' if hops != 1 else ''}{via_str})"
         )
     if len(tests) > 15:
-        click.echo(f"  (+{len(tests) - 15} more)")
-    click.echo()
+        lines.append(f"  (+{len(tests) - 15} more)")
+    lines.append("")
+    click.echo("\n".join(lines))
 
 
 def _render_blast_radius_text(blast):
     if not blast:
         return
-    click.echo("Blast radius:")
-    click.echo(
+    click.echo("\n".join([
+        "Blast radius:",
         f"  {blast['dependent_symbols']} dependent symbols in "
-        f"{blast['dependent_files']} files"
-    )
-    click.echo()
+        f"{blast['dependent_files']} files",
+        "",
+    ]))
 
 
 def _render_cluster_text(cluster):
     if not cluster:
         return
-    click.echo(
-        f"Cluster: {cluster['cluster_label']} "
-        f"({cluster['cluster_size']} symbols)"
-    )
     names = ", ".join(m["name"] for m in cluster["top_members"][:6])
     if cluster["cluster_size"] > 6:
         names += f" +{cluster['cluster_size'] - 6} more"
-    click.echo(f"  members: {names}")
-    click.echo()
+    click.echo("\n".join([
+        f"Cluster: {cluster['cluster_label']} "
+        f"({cluster['cluster_size']} symbols)",
+        f"  members: {names}",
+        "",
+    ]))
 
 
 def _render_similar_symbols_text(similar):
     if not similar:
         return
-    click.echo(f"Similar symbols ({len(similar)}):")
     rows = [
         [abbrev_kind(s["kind"]), s["name"], s["location"]]
         for s in similar[:10]
     ]
-    click.echo(format_table(["kind", "name", "location"], rows))
-    click.echo()
+    click.echo("\n".join([
+        f"Similar symbols ({len(similar)}):",
+        format_table(["kind", "name", "location"], rows),
+        "",
+    ]))
 
 
 def _render_entry_points_text(entries):
     if not entries:
         return
-    click.echo(f"Entry points reaching this ({len(entries)}):")
     rows = [
         [abbrev_kind(e["kind"]), e["name"], e["location"]]
         for e in entries
     ]
-    click.echo(format_table(["kind", "name", "location"], rows))
-    click.echo()
+    click.echo("\n".join([
+        f"Entry points reaching this ({len(entries)}):",
+        format_table(["kind", "name", "location"], rows),
+        "",
+    ]))
 
 
 def _render_file_context_text(file_context):
     if not file_context:
         return
-    click.echo(f"File context ({len(file_context)} other exports):")
+    lines = [f"File context ({len(file_context)} other exports):"]
     for fc in file_context[:15]:
         doc = " [documented]" if fc["has_docstring"] else ""
-        click.echo(
+        lines.append(
             f"  {abbrev_kind(fc['kind'])}  {fc['name']}  L{fc['line']}{doc}"
         )
     if len(file_context) > 15:
-        click.echo(f"  (+{len(file_context) - 15} more)")
-    click.echo()
+        lines.append(f"  (+{len(file_context) - 15} more)")
+    lines.append("")
+    click.echo("\n".join(lines))
+
+
+_FILE_TO_READ_LINE = "  {path:<50s} {lr:<12s} ({reason})".format
+
+
+def _render_files_to_read_text(files_to_read, skipped_total):
+    label = f", +{skipped_total} more" if skipped_total else ""
+    lines = [f"Files to read ({len(files_to_read)}{label}):"]
+    lines.extend(
+        _FILE_TO_READ_LINE(
+            path=f["path"], reason=f["reason"],
+            lr=(
+                f":{f['start']}-{f['end']}"
+                if f["end"] and f["end"] != f["start"]
+                else f":{f['start']}"
+            ) if f["start"] else "",
+        )
+        for f in files_to_read
+    )
+    click.echo("\n".join(lines))
 
 
 # ---------------------------------------------------------------------------
@@ -781,6 +930,7 @@ def _output_task_single_text(c, task, extras):
     test_callers = c["test_callers"]
     test_importers = c["test_importers"]
     siblings = c["siblings"]
+    sibling_count = c["sibling_count"]
     files_to_read = c["files_to_read"]
     skipped_callers = c["skipped_callers"]
     skipped_callees = c["skipped_callees"]
@@ -789,27 +939,28 @@ def _output_task_single_text(c, task, extras):
     limit_callers = extras.get("_limit_callers")
     limit_callees = extras.get("_limit_callees")
 
+    lines = []
     sig = sym["signature"] or ""
-    click.echo(f"=== Context for: {sym['name']} (task={task}) ===")
-    click.echo(
+    lines.append(f"=== Context for: {sym['name']} (task={task}) ===")
+    lines.append(
         f"{abbrev_kind(sym['kind'])}  "
         f"{sym['qualified_name'] or sym['name']}"
         f"{'  ' + sig if sig else ''}  "
         f"{loc(sym['file_path'], line_start)}"
     )
-    click.echo()
+    lines.append("")
 
     # understand: show docstring first
     if task == "understand" and extras.get("docstring"):
-        click.echo("Docstring:")
+        lines.append("Docstring:")
         for line in extras["docstring"].strip().splitlines()[:10]:
-            click.echo(f"  {line}")
-        click.echo()
+            lines.append(f"  {line}")
+        lines.append("")
 
     # Callers
     caller_cap = limit_callers or 20
     if non_test_callers:
-        click.echo(f"Callers ({len(non_test_callers)}):")
+        lines.append(f"Callers ({len(non_test_callers)}):")
         rows = []
         for cr in non_test_callers[:caller_cap]:
             rows.append([
@@ -817,19 +968,19 @@ def _output_task_single_text(c, task, extras):
                 loc(cr["file_path"], cr["edge_line"] or cr["line_start"]),
                 cr["edge_kind"] or "",
             ])
-        click.echo(format_table(["kind", "name", "location", "edge"], rows))
+        lines.append(format_table(["kind", "name", "location", "edge"], rows))
         if len(non_test_callers) > caller_cap:
-            click.echo(f"  (+{len(non_test_callers) - caller_cap} more)")
-        click.echo()
+            lines.append(f"  (+{len(non_test_callers) - caller_cap} more)")
+        lines.append("")
     else:
-        click.echo("Callers: (none)")
-        click.echo()
+        lines.append("Callers: (none)")
+        lines.append("")
 
     # Callees (hidden for refactor, limited for understand)
     if not hide_callees:
         callee_cap = limit_callees or 15
         if callees:
-            click.echo(f"Callees ({len(callees)}):")
+            lines.append(f"Callees ({len(callees)}):")
             rows = []
             for ce in callees[:callee_cap]:
                 rows.append([
@@ -837,40 +988,42 @@ def _output_task_single_text(c, task, extras):
                     loc(ce["file_path"], ce["line_start"]),
                     ce["edge_kind"] or "",
                 ])
-            click.echo(format_table(["kind", "name", "location", "edge"], rows))
+            lines.append(format_table(["kind", "name", "location", "edge"], rows))
             if len(callees) > callee_cap:
-                click.echo(f"  (+{len(callees) - callee_cap} more)")
-            click.echo()
+                lines.append(f"  (+{len(callees) - callee_cap} more)")
+            lines.append("")
         else:
-            click.echo("Callees: (none)")
-            click.echo()
+            lines.append("Callees: (none)")
+            lines.append("")
 
     # Tests (default for non-review/debug; those use BFS affected_tests)
     if task not in ("review", "debug"):
         if test_callers or test_importers:
-            click.echo(
+            lines.append(
                 f"Tests ({len(test_callers)} direct, "
                 f"{len(test_importers)} file-level):"
             )
             for t in test_callers:
-                click.echo(
+                lines.append(
                     f"  {abbrev_kind(t['kind'])}  {t['name']}  "
                     f"{loc(t['file_path'], t['line_start'])}"
                 )
             for ti in test_importers:
-                click.echo(f"  file  {ti['path']}")
+                lines.append(f"  file  {ti['path']}")
         else:
-            click.echo("Tests: (none)")
-        click.echo()
+            lines.append("Tests: (none)")
+        lines.append("")
 
     # Siblings (shown for refactor, understand)
     if task in ("refactor", "understand") and siblings:
-        click.echo(f"Siblings ({len(siblings)} exports in same file):")
-        for s in siblings[:10]:
-            click.echo(f"  {abbrev_kind(s['kind'])}  {s['name']}")
-        if len(siblings) > 10:
-            click.echo(f"  (+{len(siblings) - 10} more)")
-        click.echo()
+        lines.append(f"Siblings ({sibling_count} exports in same file):")
+        for s in siblings:
+            lines.append(f"  {abbrev_kind(s['kind'])}  {s['name']}")
+        if sibling_count > len(siblings):
+            lines.append(f"  (+{sibling_count - len(siblings)} more)")
+        lines.append("")
+
+    click.echo("\n".join(lines))
 
     # Task-specific extra sections
     if task == "refactor":
@@ -900,100 +1053,95 @@ def _output_task_single_text(c, task, extras):
         _render_graph_centrality_text(extras.get("graph_centrality"))
         _render_file_context_text(extras.get("file_context", []))
 
-    # Files to read
-    skipped_total = skipped_callers + skipped_callees
-    extra_label = f", +{skipped_total} more" if skipped_total else ""
-    click.echo(f"Files to read ({len(files_to_read)}{extra_label}):")
-    for f in files_to_read:
-        end_str = f"-{f['end']}" if f["end"] and f["end"] != f["start"] else ""
-        lr = f":{f['start']}{end_str}" if f["start"] else ""
-        click.echo(f"  {f['path']:<50s} {lr:<12s} ({f['reason']})")
+    _render_files_to_read_text(files_to_read, skipped_callers + skipped_callees)
 
 
 # ---------------------------------------------------------------------------
 # Task-mode output: JSON
 # ---------------------------------------------------------------------------
 
-def _output_task_single_json(c, task, extras):
-    """Build and emit JSON output for task-mode single symbol."""
+# Row fields read by the JSON payload comprehensions, unpacked as tuples
+_caller_fields = itemgetter(
+    "name", "kind", "file_path", "edge_line", "line_start", "edge_kind",
+)
+_edge_fields = itemgetter("name", "kind", "file_path", "line_start", "edge_kind")
+
+
+def _build_payload(c, task=None, extras=None):
+    """Build the single-symbol JSON payload for default or task mode.
+
+    Without *task* every section is included uncapped (default mode);
+    with one, sections and caps follow the task and its *extras*.
+    """
+    extras = extras or {}
     sym = c["sym"]
     line_start = c["line_start"]
-    line_end = c["line_end"]
     non_test_callers = c["non_test_callers"]
     callees = c["callees"]
-    test_callers = c["test_callers"]
-    test_importers = c["test_importers"]
-    siblings = c["siblings"]
-    files_to_read = c["files_to_read"]
 
-    hide_callees = extras.get("_hide_callees", False)
-    limit_callers = extras.get("_limit_callers")
-    limit_callees = extras.get("_limit_callees")
-
-    caller_cap = limit_callers or len(non_test_callers)
-    callee_cap = limit_callees or len(callees)
+    caller_cap = extras.get("_limit_callers") or len(non_test_callers)
+    callee_cap = extras.get("_limit_callees") or len(callees)
+    _loc = loc  # local alias for the per-row comprehensions below
 
-    payload = {
-        "task": task,
+    payload = {"task": task} if task else {}
+    payload.update({
         "symbol": sym["qualified_name"] or sym["name"],
         "kind": sym["kind"],
         "signature": sym["signature"] or "",
         "location": loc(sym["file_path"], line_start),
         "definition": {
             "file": sym["file_path"],
-            "start": line_start, "end": line_end,
+            "start": line_start, "end": c["line_end"],
         },
         "callers": [
-            {"name": cr["name"], "kind": cr["kind"],
-             "location": loc(
-                 cr["file_path"], cr["edge_line"] or cr["line_start"],
-             ),
-             "edge_kind": cr["edge_kind"] or ""}
-            for cr in non_test_callers[:caller_cap]
+            {"name": n, "kind": k, "location": _loc(fp, el or ls),
+             "edge_kind": ek or ""}
+            for n, k, fp, el, ls, ek in map(
+                _caller_fields, non_test_callers[:caller_cap],
+            )
         ],
-    }
+    })
 
-    if not hide_callees:
+    if not extras.get("_hide_callees", False):
         payload["callees"] = [
-            {"name": ce["name"], "kind": ce["kind"],
-             "location": loc(ce["file_path"], ce["line_start"]),
-             "edge_kind": ce["edge_kind"] or ""}
-            for ce in callees[:callee_cap]
+            {"name": n, "kind": k, "location": _loc(fp, ls),
+             "edge_kind": ek or ""}
+            for n, k, fp, ls, ek in map(_edge_fields, callees[:callee_cap])
         ]
 
     if task not in ("review", "debug"):
         payload["tests"] = [
-            {"name": t["name"], "kind": t["kind"],
-             "location": loc(t["file_path"], t["line_start"]),
-             "edge_kind": t["edge_kind"] or ""}
-            for t in test_callers
+            {"name": n, "kind": k, "location": _loc(fp, ls),
+             "edge_kind": ek or ""}
+            for n, k, fp, ls, ek in map(_edge_fields, c["test_callers"])
         ]
-        payload["test_files"] = [r["path"] for r in test_importers]
+        payload["test_files"] = [r["path"] for r in c["test_importers"]]
 
-    if task in ("refactor", "understand"):
+    if task in (None, "refactor", "understand"):
         payload["siblings"] = [
             {"name": s["name"], "kind": s["kind"]}
-            for s in siblings[:10]
+            for s in c["siblings"]
         ]
 
-    # Task-specific extras
-    for key in ("docstring", "complexity", "graph_centrality", "git_churn",
-                "blast_radius", "cluster"):
-        val = extras.get(key)
-        if val is not None:
-            payload[key] = val
-
-    for key in ("coupling", "affected_tests", "similar_symbols",
-                "entry_points_reaching", "file_context"):
-        val = extras.get(key)
-        if val:
-            payload[key] = val
-
-    payload["files_to_read"] = [
-        {"path": f["path"], "start": f["start"],
-         "end": f["end"], "reason": f["reason"]}
-        for f in files_to_read
-    ]
+    # Task-specific extras; every section is either a non-empty value or
+    # None/empty, so one truthiness test covers them all
+    payload.update(
+        (k, v) for k, v in extras.items() if v and not k.startswith("_")
+    )
+
+    payload["files_to_read"] = c["files_to_read"]
+    return payload
+
+
+def _output_task_single_json(c, task, extras):
+    """Build and emit JSON output for task-mode single symbol."""
+    non_test_callers = c["non_test_callers"]
+    callees = c["callees"]
+    test_callers = c["test_callers"]
+    files_to_read = c["files_to_read"]
+    hide_callees = extras.get("_hide_callees", False)
+
+    payload = _build_payload(c, task, extras)
 
     # Summary
     summary = {"task": task, "callers": len(non_test_callers)}
@@ -1010,7 +1158,7 @@ def _output_task_single_json(c, task, extras):
     if extras.get("coupling"):
         summary["coupling_partners"] = len(extras["coupling"])
 
-    click.echo(to_json(json_envelope("context", summary=summary, **payload)))
+    emit_json(json_envelope("context", summary=summary, **payload))
 
 
 # ---------------------------------------------------------------------------
@@ -1020,13 +1168,7 @@ def _output_task_single_json(c, task, extras):
 def _resolve_file(conn, path):
     """Resolve a file path to its DB row, or None."""
     path = path.replace("\\", "/")
-    frow = conn.execute(FILE_BY_PATH, (path,)).fetchone()
-    if frow is None:
-        frow = conn.execute(
-            "SELECT * FROM files WHERE path LIKE ? LIMIT 1",
-            (f"%{path}",),
-        ).fetchone()
-    return frow
+    return conn.execute(FILE_BY_PATH_OR_SUFFIX, (path, f"%{path}")).fetchone()
 
 
 def _gather_file_level_context(conn, frow):
@@ -1038,16 +1180,12 @@ def _gather_file_level_context(conn, frow):
     file_id = frow["id"]
     file_path = frow["path"]
 
-    # Get all symbols in the file
-    symbols = conn.execute(
-        "SELECT s.*, f.path as file_path "
-        "FROM symbols s JOIN files f ON s.file_id = f.id "
-        "WHERE s.file_id = ? ORDER BY s.line_start",
-        (file_id,),
-    ).fetchall()
-
-    sym_ids = [s["id"] for s in symbols]
-    if not sym_ids:
+    # The file's symbols are selected by file_id inside each query below,
+    # so no id list is built or bound; only the count is needed here.
+    symbol_count = conn.execute(
+        "SELECT COUNT(*) FROM symbols WHERE file_id = ?", (file_id,),
+    ).fetchone()[0]
+    if not symbol_count:
         return {
             "file_path": file_path,
             "symbol_count": 0,
@@ -1058,111 +1196,73 @@ def _gather_file_level_context(conn, frow):
             "complexity": None,
         }
 
-    # --- Callers: symbols in OTHER files that reference symbols in this file ---
-    caller_rows = batched_in(
-        conn,
-        "SELECT e.target_id, s.name as caller_name, s.kind as caller_kind, "
-        "f.path as caller_file, s.line_start as caller_line, "
-        "ts.name as target_name "
-        "FROM edges e "
-        "JOIN symbols s ON e.source_id = s.id "
-        "JOIN files f ON s.file_id = f.id "
-        "JOIN symbols ts ON e.target_id = ts.id "
-        "WHERE e.target_id IN ({ph}) AND s.file_id != ?",
-        sym_ids,
-        post=[file_id],
-    )
-
-    # Group callers by source file
-    callers_by_file = defaultdict(list)
-    for r in caller_rows:
-        if not is_test_file(r["caller_file"]):
-            callers_by_file[r["caller_file"]].append(r["target_name"])
+    # --- Cross-file edges in one pass, grouped and ordered in SQLite ---
+    # Callers: symbols in OTHER files that reference symbols in this file
+    # (``names`` are the referenced symbols here).  Callees: symbols in
+    # OTHER files that this file's symbols reference.  UNION drops duplicate
+    # (role, path, name) rows before grouping; names are joined with the
+    # unit separator (0x1f), which cannot appear in an identifier.
+    edge_rows = conn.execute(
+        "SELECT role, path, GROUP_CONCAT(name, char(31)) as names FROM ("
+        "  SELECT 'caller' as role, f.path as path, ts.name as name "
+        "  FROM symbols ts "
+        "  JOIN edges e ON e.target_id = ts.id "
+        "  JOIN symbols s ON e.source_id = s.id "
+        "  JOIN files f ON s.file_id = f.id "
+        "  WHERE ts.file_id = ?1 AND s.file_id != ?1 "
+        "  UNION "
+        "  SELECT 'callee' as role, f.path as path, s.name as name "
+        "  FROM symbols src "
+        "  JOIN edges e ON e.source_id = src.id "
+        "  JOIN symbols s ON e.target_id = s.id "
+        "  JOIN files f ON s.file_id = f.id "
+        "  WHERE src.file_id = ?1 AND s.file_id != ?1"
+        ") GROUP BY role, path ORDER BY role, path",
+        (file_id,),
+    ).fetchall()
 
+    # Rows arrive sorted by path, one per (role, file); test files among
+    # the callers are the direct tests.
     callers = []
-    for cfile, targets in sorted(callers_by_file.items()):
-        unique_targets = sorted(set(targets))
-        callers.append({
-            "file": cfile,
-            "symbols": unique_targets,
-            "count": len(unique_targets),
-        })
-
-    # --- Callees: symbols in OTHER files that this file's symbols reference ---
-    callee_rows = batched_in(
-        conn,
-        "SELECT e.source_id, s.name as callee_name, s.kind as callee_kind, "
-        "f.path as callee_file, s.line_start as callee_line "
-        "FROM edges e "
-        "JOIN symbols s ON e.target_id = s.id "
-        "JOIN files f ON s.file_id = f.id "
-        "WHERE e.source_id IN ({ph}) AND s.file_id != ?",
-        sym_ids,
-        post=[file_id],
-    )
-
-    # Group callees by target file
-    callees_by_file = defaultdict(list)
-    for r in callee_rows:
-        callees_by_file[r["callee_file"]].append(r["callee_name"])
-
     callees = []
-    for cfile, names in sorted(callees_by_file.items()):
-        unique_names = sorted(set(names))
-        callees.append({
-            "file": cfile,
-            "symbols": unique_names,
-            "count": len(unique_names),
-        })
+    direct_tests = []
+    is_test = is_test_file  # local alias for the per-row loop
+    for r in edge_rows:
+        path = r["path"]
+        if r["role"] == "caller" and is_test(path):
+            direct_tests.append(path)
+            continue
+        names = sorted(r["names"].split("\x1f"))
+        entry = {"file": path, "symbols": names, "count": len(names)}
+        (callers if r["role"] == "caller" else callees).append(entry)
 
     # --- Tests: test files that reference any symbol in this file ---
-    test_caller_rows = batched_in(
-        conn,
-        "SELECT DISTINCT f.path "
-        "FROM edges e "
-        "JOIN symbols s ON e.source_id = s.id "
-        "JOIN files f ON s.file_id = f.id "
-        "WHERE e.target_id IN ({ph}) AND s.file_id != ?",
-        sym_ids,
-        post=[file_id],
-    )
-
-    direct_tests = sorted(set(
-        r["path"] for r in test_caller_rows if is_test_file(r["path"])
-    ))
-
     # Also check file_edges for file-level test importers
     test_importers = conn.execute(
         "SELECT f.path FROM file_edges fe "
         "JOIN files f ON fe.source_file_id = f.id "
-        "WHERE fe.target_file_id = ?",
+        "WHERE fe.target_file_id = ? AND is_test_file(f.path)",
         (file_id,),
     ).fetchall()
-    file_level_tests = sorted(set(
-        r["path"] for r in test_importers if is_test_file(r["path"])
-    ))
+    # Direct tests win; file-level only adds importers not already listed
+    file_level_tests = sorted(
+        {r["path"] for r in test_importers}.difference(direct_tests)
+    )
 
     # Merge direct + file-level, mark kind
-    test_set = set()
-    tests = []
-    for t in direct_tests:
-        test_set.add(t)
-        tests.append({"file": t, "kind": "direct"})
-    for t in file_level_tests:
-        if t not in test_set:
-            test_set.add(t)
-            tests.append({"file": t, "kind": "file-level"})
+    tests = [{"file": t, "kind": "direct"} for t in direct_tests]
+    tests.extend({"file": t, "kind": "file-level"} for t in file_level_tests)
 
     # --- Coupling ---
-    coupling = _get_coupling(conn, file_path, limit=10)
+    coupling = _get_coupling(conn, file_id, limit=10)
 
     # --- Complexity summary ---
-    metrics_rows = batched_in(
-        conn,
-        "SELECT sm.* FROM symbol_metrics sm "
-        "WHERE sm.symbol_id IN ({ph})",
-        sym_ids,
-    )
+    metrics_rows = conn.execute(
+        "SELECT sm.cognitive_complexity FROM symbols s "
+        "JOIN symbol_metrics sm ON sm.symbol_id = s.id "
+        "WHERE s.file_id = ? ORDER BY s.id",
+        (file_id,),
+    ).fetchall()
 
     complexity = None
     if metrics_rows:
@@ -1180,7 +1280,7 @@ def _gather_file_level_context(conn, frow):
         "file_path": file_path,
         "language": frow["language"],
         "line_count": frow["line_count"],
-        "symbol_count": len(symbols),
+        "symbol_count": symbol_count,
         "callers": callers,
         "callees": callees,
         "tests": tests,
@@ -1191,77 +1291,79 @@ def _gather_file_level_context(conn, frow):
 
 def _output_file_context_text(data):
     """Render --for-file context as text."""
-    click.echo(
+    lines = [
         f"Context for {data['file_path']} "
-        f"({data['symbol_count']} symbols):"
-    )
-    click.echo()
+        f"({data['symbol_count']} symbols):",
+        "",
+    ]
 
     # Callers
     callers = data["callers"]
     if callers:
-        click.echo(f"Callers ({len(callers)} unique files):")
+        lines.append(f"Callers ({len(callers)} unique files):")
         for c in callers[:20]:
             syms = ", ".join(c["symbols"][:3])
             if len(c["symbols"]) > 3:
                 syms += f" +{len(c['symbols']) - 3} more"
-            click.echo(f"  {c['file']:<50s} \u2192 {syms}")
+            lines.append(f"  {c['file']:<50s} \u2192 {syms}")
         if len(callers) > 20:
-            click.echo(f"  (+{len(callers) - 20} more)")
-        click.echo()
+            lines.append(f"  (+{len(callers) - 20} more)")
+        lines.append("")
     else:
-        click.echo("Callers: (none)")
-        click.echo()
+        lines.append("Callers: (none)")
+        lines.append("")
 
     # Callees
     callees = data["callees"]
     if callees:
-        click.echo(f"Callees ({len(callees)} unique files):")
+        lines.append(f"Callees ({len(callees)} unique files):")
         for c in callees[:20]:
             syms = ", ".join(c["symbols"][:3])
             if len(c["symbols"]) > 3:
                 syms += f" +{len(c['symbols']) - 3} more"
-            click.echo(f"  {c['file']:<50s} \u2190 {syms}")
+            lines.append(f"  {c['file']:<50s} \u2190 {syms}")
         if len(callees) > 20:
-            click.echo(f"  (+{len(callees) - 20} more)")
-        click.echo()
+            lines.append(f"  (+{len(callees) - 20} more)")
+        lines.append("")
     else:
-        click.echo("Callees: (none)")
-        click.echo()
+        lines.append("Callees: (none)")
+        lines.append("")
 
     # Tests
     tests = data["tests"]
     if tests:
         direct = sum(1 for t in tests if t["kind"] == "direct")
         file_lvl = sum(1 for t in tests if t["kind"] == "file-level")
-        click.echo(f"Tests ({direct} direct, {file_lvl} file-level):")
+        lines.append(f"Tests ({direct} direct, {file_lvl} file-level):")
         for t in tests:
-            click.echo(f"  {t['file']} ({t['kind']})")
-        click.echo()
+            lines.append(f"  {t['file']} ({t['kind']})")
+        lines.append("")
     else:
-        click.echo("Tests: (none)")
-        click.echo()
+        lines.append("Tests: (none)")
+        lines.append("")
 
     # Coupling
     coupling = data["coupling"]
     if coupling:
-        click.echo(f"Coupling ({len(coupling)} partners):")
+        lines.append(f"Coupling ({len(coupling)} partners):")
         rows = [
             [c["path"], str(c["cochange_count"]), f"{c['strength']:.0%}"]
             for c in coupling[:10]
         ]
-        click.echo(format_table(["file", "co-changes", "strength"], rows))
-        click.echo()
+        lines.append(format_table(["file", "co-changes", "strength"], rows))
+        lines.append("")
 
     # Complexity
     cx = data["complexity"]
     if cx:
-        click.echo(
+        lines.append(
             f"Complexity: avg={cx['avg']}, max={cx['max']}, "
             f"{cx['count_above_threshold']} above threshold "
             f"(>{cx['threshold']})"
         )
-        click.echo()
+        lines.append("")
+
+    click.echo("\n".join(lines))
 
 
 def _output_file_context_json(data):
@@ -1277,7 +1379,7 @@ def _output_file_context_json(data):
         summary["complexity_avg"] = data["complexity"]["avg"]
         summary["complexity_max"] = data["complexity"]["max"]
 
-    click.echo(to_json(json_envelope("context",
+    emit_json(json_envelope("context",
         summary=summary,
         mode="file",
         file=data["file_path"],
@@ -1289,7 +1391,7 @@ def _output_file_context_json(data):
         tests=data["tests"],
         coupling=data["coupling"],
         complexity=data["complexity"],
-    )))
+    ))
 
 
 # ---------------------------------------------------------------------------
@@ -1355,16 +1457,16 @@ def context(ctx, names, task, for_file):
 
     with open_db(readonly=True) as conn:
         # Resolve all symbols
-        resolved = []
-        for name in names:
-            sym = find_symbol(conn, name)
-            if sym is None:
+        found = find_symbols(conn, names)
+        missing = [name for name in dict.fromkeys(names) if found[name] is None]
+        if missing:
+            for name in missing:
                 click.echo(f"Symbol not found: {name}")
-                raise SystemExit(1)
-            resolved.append(sym)
+            raise SystemExit(1)
+        resolved = [found[name] for name in names]
 
         # Gather context for each
-        contexts = [_gather_symbol_context(conn, sym) for sym in resolved]
+        contexts = _gather_symbol_contexts(conn, resolved)
 
         # --- Batch mode (--task is ignored) ---
         if len(contexts) > 1:
@@ -1378,7 +1480,7 @@ def context(ctx, names, task, for_file):
             )
 
             if json_mode:
-                click.echo(to_json(json_envelope("context",
+                emit_json(json_envelope("context",
                     summary={
                         "symbols": len(contexts),
                         "shared_callers": len(shared_callers),
@@ -1416,54 +1518,55 @@ def context(ctx, names, task, for_file):
                         for c in shared_callees
                     ],
                     files_to_read=scored_files,
-                )))
+                ))
                 return
 
             # Text batch output
-            click.echo(f"=== Batch Context ({len(contexts)} symbols) ===\n")
+            lines = [f"=== Batch Context ({len(contexts)} symbols) ===\n"]
 
             for c in contexts:
                 s = c["sym"]
                 sig = s["signature"] or ""
-                click.echo(f"--- {s['name']} ---")
-                click.echo(
+                lines.append(f"--- {s['name']} ---")
+                lines.append(
                     f"  {abbrev_kind(s['kind'])}  "
                     f"{s['qualified_name'] or s['name']}"
                     f"{'  ' + sig if sig else ''}  "
                     f"{loc(s['file_path'], c['line_start'])}"
                 )
-                click.echo(
+                lines.append(
                     f"  Callers: {len(c['non_test_callers'])}  "
                     f"Callees: {len(c['callees'])}  "
                     f"Tests: {len(c['test_callers'])}"
                 )
-                click.echo()
+                lines.append("")
 
             if shared_callers:
-                click.echo(f"Shared callers ({len(shared_callers)}):")
+                lines.append(f"Shared callers ({len(shared_callers)}):")
                 rows = [[abbrev_kind(c["kind"]), c["name"],
                          loc(c["file_path"], c["line_start"])]
                         for c in shared_callers[:15]]
-                click.echo(format_table(["kind", "name", "location"], rows))
-                click.echo()
+                lines.append(format_table(["kind", "name", "location"], rows))
+                lines.append("")
 
             if shared_callees:
-                click.echo(f"Shared callees ({len(shared_callees)}):")
+                lines.append(f"Shared callees ({len(shared_callees)}):")
                 rows = [[abbrev_kind(c["kind"]), c["name"],
                          loc(c["file_path"], c["line_start"])]
                         for c in shared_callees[:15]]
-                click.echo(format_table(["kind", "name", "location"], rows))
-                click.echo()
+                lines.append(format_table(["kind", "name", "location"], rows))
+                lines.append("")
 
-            click.echo(f"Files to read ({len(scored_files)}):")
+            lines.append(f"Files to read ({len(scored_files)}):")
             for f in scored_files[:25]:
                 reasons = ", ".join(f["reasons"])
                 rel_str = f"{f['relevance']:.0%}" if f["relevance"] > 0 else ""
-                click.echo(
+                lines.append(
                     f"  {f['path']:<50s} {rel_str:>5s}  ({reasons})"
                 )
             if len(scored_files) > 25:
-                click.echo(f"  (+{len(scored_files) - 25} more)")
+                lines.append(f"  (+{len(scored_files) - 25} more)")
+            click.echo("\n".join(lines))
             return
 
         # --- Single symbol mode ---
@@ -1481,76 +1584,42 @@ def context(ctx, names, task, for_file):
 
         # --- Default single symbol mode (original behavior) ---
         line_start = c["line_start"]
-        line_end = c["line_end"]
         non_test_callers = c["non_test_callers"]
         callees = c["callees"]
         test_callers = c["test_callers"]
         test_importers = c["test_importers"]
         siblings = c["siblings"]
+        sibling_count = c["sibling_count"]
         files_to_read = c["files_to_read"]
         skipped_callers = c["skipped_callers"]
         skipped_callees = c["skipped_callees"]
 
         if json_mode:
-            click.echo(to_json(json_envelope("context",
+            emit_json(json_envelope("context",
                 summary={
                     "callers": len(non_test_callers),
                     "callees": len(callees),
                     "tests": len(test_callers),
                     "files_to_read": len(files_to_read),
                 },
-                symbol=sym["qualified_name"] or sym["name"],
-                kind=sym["kind"],
-                signature=sym["signature"] or "",
-                location=loc(sym["file_path"], line_start),
-                definition={
-                    "file": sym["file_path"],
-                    "start": line_start, "end": line_end,
-                },
-                callers=[
-                    {"name": cr["name"], "kind": cr["kind"],
-                     "location": loc(cr["file_path"], cr["edge_line"] or cr["line_start"]),
-                     "edge_kind": cr["edge_kind"] or ""}
-                    for cr in non_test_callers
-                ],
-                callees=[
-                    {"name": ce["name"], "kind": ce["kind"],
-                     "location": loc(ce["file_path"], ce["line_start"]),
-                     "edge_kind": ce["edge_kind"] or ""}
-                    for ce in callees
-                ],
-                tests=[
-                    {"name": t["name"], "kind": t["kind"],
-                     "location": loc(t["file_path"], t["line_start"]),
-                     "edge_kind": t["edge_kind"] or ""}
-                    for t in test_callers
-                ],
-                test_files=[r["path"] for r in test_importers],
-                siblings=[
-                    {"name": s["name"], "kind": s["kind"]}
-                    for s in siblings[:10]
-                ],
-                files_to_read=[
-                    {"path": f["path"], "start": f["start"],
-                     "end": f["end"], "reason": f["reason"]}
-                    for f in files_to_read
-                ],
-            )))
+                **_build_payload(c),
+            ))
             return
 
         # --- Text output ---
+        lines = []
         sig = sym["signature"] or ""
-        click.echo(f"=== Context for: {sym['name']} ===")
-        click.echo(
+        lines.append(f"=== Context for: {sym['name']} ===")
+        lines.append(
             f"{abbrev_kind(sym['kind'])}  "
             f"{sym['qualified_name'] or sym['name']}"
             f"{'  ' + sig if sig else ''}  "
             f"{loc(sym['file_path'], line_start)}"
         )
-        click.echo()
+        lines.append("")
 
         if non_test_callers:
-            click.echo(f"Callers ({len(non_test_callers)}):")
+            lines.append(f"Callers ({len(non_test_callers)}):")
             rows = []
             for cr in non_test_callers[:20]:
                 rows.append([
@@ -1558,16 +1627,16 @@ def context(ctx, names, task, for_file):
                     loc(cr["file_path"], cr["edge_line"] or cr["line_start"]),
                     cr["edge_kind"] or "",
                 ])
-            click.echo(format_table(["kind", "name", "location", "edge"], rows))
+            lines.append(format_table(["kind", "name", "location", "edge"], rows))
             if len(non_test_callers) > 20:
-                click.echo(f"  (+{len(non_test_callers) - 20} more)")
-            click.echo()
+                lines.append(f"  (+{len(non_test_callers) - 20} more)")
+            lines.append("")
         else:
-            click.echo("Callers: (none)")
-            click.echo()
+            lines.append("Callers: (none)")
+            lines.append("")
 
         if callees:
-            click.echo(f"Callees ({len(callees)}):")
+            lines.append(f"Callees ({len(callees)}):")
             rows = []
             for ce in callees[:15]:
                 rows.append([
@@ -1575,48 +1644,39 @@ def context(ctx, names, task, for_file):
                     loc(ce["file_path"], ce["line_start"]),
                     ce["edge_kind"] or "",
                 ])
-            click.echo(format_table(["kind", "name", "location", "edge"], rows))
+            lines.append(format_table(["kind", "name", "location", "edge"], rows))
             if len(callees) > 15:
-                click.echo(f"  (+{len(callees) - 15} more)")
-            click.echo()
+                lines.append(f"  (+{len(callees) - 15} more)")
+            lines.append("")
         else:
-            click.echo("Callees: (none)")
-            click.echo()
+            lines.append("Callees: (none)")
+            lines.append("")
 
         if test_callers or test_importers:
-            click.echo(
+            lines.append(
                 f"Tests ({len(test_callers)} direct, "
                 f"{len(test_importers)} file-level):"
             )
             for t in test_callers:
-                click.echo(
+                lines.append(
                     f"  {abbrev_kind(t['kind'])}  {t['name']}  "
                     f"{loc(t['file_path'], t['line_start'])}"
                 )
             for ti in test_importers:
-                click.echo(f"  file  {ti['path']}")
+                lines.append(f"  file  {ti['path']}")
         else:
-            click.echo("Tests: (none)")
-        click.echo()
+            lines.append("Tests: (none)")
+        lines.append("")
 
         if siblings:
-            click.echo(f"Siblings ({len(siblings)} exports in same file):")
-            for s in siblings[:10]:
-                click.echo(f"  {abbrev_kind(s['kind'])}  {s['name']}")
-            if len(siblings) > 10:
-                click.echo(f"  (+{len(siblings) - 10} more)")
-            click.echo()
-
-        skipped_total = skipped_callers + skipped_callees
-        extra = f", +{skipped_total} more" if skipped_total else ""
-        click.echo(f"Files to read ({len(files_to_read)}{extra}):")
-        for f in files_to_read:
-            end_str = (
-                f"-{f['end']}"
-                if f["end"] and f["end"] != f["start"]
-                else ""
-            )
-            lr = f":{f['start']}{end_str}" if f["start"] else ""
-            click.echo(
-                f"  {f['path']:<50s} {lr:<12s} ({f['reason']})"
-            )
+            lines.append(f"Siblings ({sibling_count} exports in same file):")
+            for s in siblings:
+                lines.append(f"  {abbrev_kind(s['kind'])}  {s['name']}")
+            if sibling_count > len(siblings):
+                lines.append(f"  (+{sibling_count - len(siblings)} more)")
+            lines.append("")
+
+        click.echo("\n".join(lines))
+        _render_files_to_read_text(
+            files_to_read, skipped_callers + skipped_callees,
+        )
@@ -4,8 +4,8 @@ import hashlib
 
 import click
 
-from roam.db.connection import open_db, find_project_root
-from roam.output.formatter import format_table, to_json, json_envelope
+from roam.db.connection import open_db, find_project_root, batched_in
+from roam.output.formatter import format_table, json_envelope, emit_json
 from roam.commands.resolve import ensure_index
 from roam.commands.changed_files import get_changed_files, resolve_changed_to_db
 
@@ -25,11 +25,17 @@ def _compute_surprise(conn, change_fids):
 
     change_set = set(change_fids)
 
-    # Get all hyperedge IDs that share at least one member with our change set
+    # One pass: overlap with the change set for every hyperedge sharing a
+    # member.  Members are unique per hyperedge, so |A ∪ B| follows from
+    # file_count without fetching the member lists.
     ph = ",".join("?" for _ in change_set)
     candidate_edges = conn.execute(
-        f"""SELECT DISTINCT hyperedge_id FROM git_hyperedge_members
-            WHERE file_id IN ({ph})""",
+        f"""SELECT gm.hyperedge_id, gh.file_count, COUNT(*) AS overlap
+            FROM git_hyperedge_members gm
+            JOIN git_hyperedges gh ON gh.id = gm.hyperedge_id
+            WHERE gm.file_id IN ({ph})
+            GROUP BY gm.hyperedge_id
+            ORDER BY gm.hyperedge_id""",
         list(change_set),
     ).fetchall()
 
@@ -37,33 +43,29 @@ def _compute_surprise(conn, change_fids):
         return 0.5, None, 0.0  # no history → moderate surprise
 
     max_jaccard = 0.0
-    best_pattern = None
+    best_edge = None
 
     for row in candidate_edges:
-        he_id = row["hyperedge_id"]
-        members = conn.execute(
-            "SELECT file_id FROM git_hyperedge_members WHERE hyperedge_id = ?",
-            (he_id,),
-        ).fetchall()
-        pattern_set = {m["file_id"] for m in members}
-
-        intersection = len(change_set & pattern_set)
-        union = len(change_set | pattern_set)
+        union = row["file_count"] + len(change_set) - row["overlap"]
         if union > 0:
-            jaccard = intersection / union
+            jaccard = row["overlap"] / union
             if jaccard > max_jaccard:
                 max_jaccard = jaccard
-                best_pattern = pattern_set
+                best_edge = row["hyperedge_id"]
 
-    # Resolve best pattern paths
+    # Resolve best pattern paths, sorted by SQLite (BINARY collation orders
+    # UTF-8 paths the same way Python's sorted() does)
     best_paths = None
-    if best_pattern:
-        ph = ",".join("?" for _ in best_pattern)
-        rows = conn.execute(
-            f"SELECT path FROM files WHERE id IN ({ph})",
-            list(best_pattern),
-        ).fetchall()
-        best_paths = sorted(r["path"] for r in rows)
+    if best_edge is not None:
+        best_paths = [
+            r["path"] for r in conn.execute(
+                """SELECT f.path FROM git_hyperedge_members gm
+                   JOIN files f ON f.id = gm.file_id
+                   WHERE gm.hyperedge_id = ?
+                   ORDER BY f.path""",
+                (best_edge,),
+            )
+        ]
 
     return round(1.0 - max_jaccard, 3), best_paths, round(max_jaccard, 3)
 
@@ -74,39 +76,55 @@ def _compute_surprise(conn, change_fids):
 
 def _against_mode(conn, change_fids, file_map, min_strength, min_cochanges):
     """Check which co-change partners are missing from the change set."""
-    path_to_id = {}
-    file_commits = {}
-    for f in conn.execute("SELECT id, path FROM files").fetchall():
-        path_to_id[f["path"]] = f["id"]
-    id_to_path = {v: k for k, v in path_to_id.items()}
-    for fs in conn.execute("SELECT file_id, commit_count FROM file_stats").fetchall():
-        file_commits[fs["file_id"]] = fs["commit_count"] or 1
-
     change_set = set(change_fids)
     missing = []
     included = []
 
+    # Co-change partners for the whole change set in one scan of
+    # git_cochange rather than one per file.  A pair joining two changed
+    # files can come back from two batches, so rows are deduped by rowid
+    # and handed out in rowid order, the order a per-file scan returns.
+    # Paths and commit counts (missing or zero counts as 1) are joined in
+    # for just these pairs instead of mapping every file up front, and
+    # pairs under min_cochanges never leave SQLite.
+    pair_rows = {
+        r["rowid"]: r
+        for r in batched_in(
+            conn,
+            "SELECT gc.rowid, gc.file_id_a, gc.file_id_b, gc.cochange_count, "
+            "fa.path as path_a, fb.path as path_b, "
+            "COALESCE(NULLIF(sa.commit_count, 0), 1) as commits_a, "
+            "COALESCE(NULLIF(sb.commit_count, 0), 1) as commits_b "
+            "FROM git_cochange gc "
+            "LEFT JOIN files fa ON fa.id = gc.file_id_a "
+            "LEFT JOIN files fb ON fb.id = gc.file_id_b "
+            "LEFT JOIN file_stats sa ON sa.file_id = gc.file_id_a "
+            "LEFT JOIN file_stats sb ON sb.file_id = gc.file_id_b "
+            "WHERE (gc.file_id_a IN ({ph}) OR gc.file_id_b IN ({ph})) "
+            "AND gc.cochange_count >= ?",
+            change_set, post=[min_cochanges],
+        )
+    }
+    partners_by_fid = {}
+    for _, r in sorted(pair_rows.items()):
+        for end in (r["file_id_a"], r["file_id_b"]):
+            if end in change_set:
+                partners_by_fid.setdefault(end, []).append(r)
+
     for path, fid in file_map.items():
-        # Get co-change partners
-        partners = conn.execute(
-            """SELECT file_id_a, file_id_b, cochange_count
-               FROM git_cochange
-               WHERE file_id_a = ? OR file_id_b = ?""",
-            (fid, fid),
-        ).fetchall()
-
-        for p in partners:
-            partner_fid = p["file_id_b"] if p["file_id_a"] == fid else p["file_id_a"]
+        for p in partners_by_fid.get(fid, []):
+            if p["file_id_a"] == fid:
+                partner_fid, partner_path = p["file_id_b"], p["path_b"]
+            else:
+                partner_fid, partner_path = p["file_id_a"], p["path_a"]
             cochanges = p["cochange_count"]
-            if cochanges < min_cochanges:
-                continue
-
-            avg = (file_commits.get(fid, 1) + file_commits.get(partner_fid, 1)) / 2
+            avg = (p["commits_a"] + p["commits_b"]) / 2
             strength = cochanges / avg if avg > 0 else 0
             if strength < min_strength:
                 continue
 
-            partner_path = id_to_path.get(partner_fid, f"file_id={partner_fid}")
+            if partner_path is None:
+                partner_path = f"file_id={partner_fid}"
             entry = {
                 "path": partner_path,
                 "strength": round(strength, 2),
@@ -160,9 +178,9 @@ def coupling(ctx, count, staged, commit_range, min_strength, min_cochanges):
             if not changed:
                 label = commit_range or "staged"
                 if json_mode:
-                    click.echo(to_json(json_envelope("coupling",
+                    emit_json(json_envelope("coupling",
                         summary={"error": f"No changes for {label}"},
-                    )))
+                    ))
                 else:
                     click.echo(f"No changes found for {label}.")
                 return
@@ -170,9 +188,9 @@ def coupling(ctx, count, staged, commit_range, min_strength, min_cochanges):
             file_map = resolve_changed_to_db(conn, changed)
             if not file_map:
                 if json_mode:
-                    click.echo(to_json(json_envelope("coupling",
+                    emit_json(json_envelope("coupling",
                         summary={"error": "Changed files not in index"},
-                    )))
+                    ))
                 else:
                     click.echo("Changed files not found in index.")
                 return
@@ -198,18 +216,21 @@ def coupling(ctx, count, staged, commit_range, min_strength, min_cochanges):
                     missing_cochanges=missing[:30],
                     included_partners=included[:20],
                 )
-                click.echo(to_json(envelope))
+                emit_json(envelope)
                 return
 
             label = commit_range or "staged"
-            click.echo(f"=== Coupling Check ({label}, {len(file_map)} files) ===\n")
-            click.echo(f"Surprise score: {surprise:.0%}"
-                        f"{'  (unfamiliar combination!)' if surprise > 0.7 else ''}")
-            click.echo()
+            lines = [
+                f"=== Coupling Check ({label}, {len(file_map)} files) ===",
+                "",
+                f"Surprise score: {surprise:.0%}"
+                f"{'  (unfamiliar combination!)' if surprise > 0.7 else ''}",
+                "",
+            ]
 
             if missing:
-                click.echo(f"Missing co-change partners ({len(missing)}):")
-                click.echo("(files you usually change together but are not in this diff)")
+                lines.append(f"Missing co-change partners ({len(missing)}):")
+                lines.append("(files you usually change together but are not in this diff)")
                 rows = []
                 for m in missing[:20]:
                     rows.append([
@@ -218,121 +239,108 @@ def coupling(ctx, count, staged, commit_range, min_strength, min_cochanges):
                         str(m["cochanges"]),
                         m["partner_of"],
                     ])
-                click.echo(format_table(
+                lines.append(format_table(
                     ["Status", "File", "Strength", "Co-changes", "Partner of"],
                     rows,
                 ))
             else:
-                click.echo("No missing co-change partners.")
+                lines.append("No missing co-change partners.")
 
             if included:
-                click.echo(f"\nIncluded partners ({len(included)}):")
+                lines.append(f"\nIncluded partners ({len(included)}):")
                 rows = []
                 for i in included[:10]:
                     rows.append([
                         "OK", i["path"], f"{i['strength']:.0%}",
                         str(i["cochanges"]),
                     ])
-                click.echo(format_table(
+                lines.append(format_table(
                     ["Status", "File", "Strength", "Co-changes"],
                     rows,
                 ))
+            click.echo("\n".join(lines))
             return
 
         # --- Default mode: top co-change pairs ---
+        # Commit counts and the structural check (an import edge carrying
+        # 2+ symbols, either direction) come back with the top pairs, so
+        # only ``count`` rows are read and file_edges is probed per pair
+        # instead of loaded whole.  A missing or zero commit_count counts
+        # as 1.
         rows = conn.execute("""
             SELECT fa.path as path_a, fb.path as path_b,
-                   gc.cochange_count
+                   gc.cochange_count,
+                   COALESCE(NULLIF(sa.commit_count, 0), 1) as commits_a,
+                   COALESCE(NULLIF(sb.commit_count, 0), 1) as commits_b,
+                   EXISTS (
+                       SELECT 1 FROM file_edges fe
+                       WHERE fe.source_file_id = gc.file_id_a
+                         AND fe.target_file_id = gc.file_id_b
+                         AND fe.symbol_count >= 2
+                   ) OR EXISTS (
+                       SELECT 1 FROM file_edges fe
+                       WHERE fe.source_file_id = gc.file_id_b
+                         AND fe.target_file_id = gc.file_id_a
+                         AND fe.symbol_count >= 2
+                   ) as has_struct
             FROM git_cochange gc
             JOIN files fa ON gc.file_id_a = fa.id
             JOIN files fb ON gc.file_id_b = fb.id
+            LEFT JOIN file_stats sa ON sa.file_id = fa.id
+            LEFT JOIN file_stats sb ON sb.file_id = fb.id
             ORDER BY gc.cochange_count DESC
             LIMIT ?
         """, (count,)).fetchall()
 
         if not rows:
             if json_mode:
-                click.echo(to_json(json_envelope("coupling",
+                emit_json(json_envelope("coupling",
                     summary={"pairs": 0},
                     pairs=[],
-                )))
+                ))
             else:
                 click.echo("No co-change data available. Run `roam index` on a git repository.")
             return
 
-        # Check which pairs have structural connections (file_edges)
-        file_edge_set = set()
-        fe_rows = conn.execute(
-            "SELECT source_file_id, target_file_id FROM file_edges WHERE symbol_count >= 2"
-        ).fetchall()
-        for fe in fe_rows:
-            file_edge_set.add((fe["source_file_id"], fe["target_file_id"]))
-            file_edge_set.add((fe["target_file_id"], fe["source_file_id"]))
-
-        # Build file path -> id lookup and commit counts for normalization
-        path_to_id = {}
-        file_commits = {}
-        for f in conn.execute("SELECT id, path FROM files").fetchall():
-            path_to_id[f["path"]] = f["id"]
-        for fs in conn.execute("SELECT file_id, commit_count FROM file_stats").fetchall():
-            file_commits[fs["file_id"]] = fs["commit_count"] or 1
-
         table_rows = []
+        pairs = []
         for r in rows:
             path_a = r["path_a"]
             path_b = r["path_b"]
             cochange = r["cochange_count"]
-            fid_a = path_to_id.get(path_a)
-            fid_b = path_to_id.get(path_b)
-
-            has_edge = ""
-            if fid_a and fid_b:
-                if (fid_a, fid_b) in file_edge_set:
-                    has_edge = "yes"
-                else:
-                    has_edge = "HIDDEN"
-
-            strength = ""
-            if fid_a and fid_b:
-                avg_commits = (file_commits.get(fid_a, 1) + file_commits.get(fid_b, 1)) / 2
-                if avg_commits > 0:
-                    ratio = cochange / avg_commits
-                    strength = f"{ratio:.0%}"
-
-            table_rows.append([str(cochange), strength, has_edge, path_a, path_b])
+            has_struct = bool(r["has_struct"])
+            ratio = cochange / ((r["commits_a"] + r["commits_b"]) / 2)
+
+            table_rows.append([
+                str(cochange), f"{ratio:.0%}",
+                "yes" if has_struct else "HIDDEN", path_a, path_b,
+            ])
+            pairs.append({
+                "file_a": path_a, "file_b": path_b,
+                "cochange_count": cochange,
+                "strength": round(ratio, 2),
+                "has_structural_edge": has_struct,
+            })
 
         if json_mode:
-            pairs = []
-            for r in rows:
-                pa, pb = r["path_a"], r["path_b"]
-                fid_a, fid_b = path_to_id.get(pa), path_to_id.get(pb)
-                has_struct = bool(fid_a and fid_b and (fid_a, fid_b) in file_edge_set)
-                strength_val = None
-                if fid_a and fid_b:
-                    avg = (file_commits.get(fid_a, 1) + file_commits.get(fid_b, 1)) / 2
-                    if avg > 0:
-                        strength_val = round(r["cochange_count"] / avg, 2)
-                pairs.append({
-                    "file_a": pa, "file_b": pb,
-                    "cochange_count": r["cochange_count"],
-                    "strength": strength_val,
-                    "has_structural_edge": has_struct,
-                })
             hidden_pairs = sum(1 for p in pairs if not p["has_structural_edge"])
-            click.echo(to_json(json_envelope("coupling",
+            emit_json(json_envelope("coupling",
                 summary={"pairs": len(pairs), "hidden_coupling": hidden_pairs},
                 pairs=pairs,
-            )))
+            ))
             return
 
-        click.echo("=== Temporal coupling (co-change frequency) ===")
-        click.echo(format_table(
-            ["co-changes", "strength", "structural?", "file A", "file B"],
-            table_rows,
-        ))
+        lines = [
+            "=== Temporal coupling (co-change frequency) ===",
+            format_table(
+                ["co-changes", "strength", "structural?", "file A", "file B"],
+                table_rows,
+            ),
+        ]
 
         hidden_count = sum(1 for r in table_rows if r[2] == "HIDDEN")
         total_pairs = len(table_rows)
         if hidden_count:
             pct = hidden_count * 100 / total_pairs if total_pairs else 0
-            click.echo(f"\n{hidden_count}/{total_pairs} pairs ({pct:.0f}%) have NO import edge but co-change frequently (hidden coupling).")
+            lines.append(f"\n{hidden_count}/{total_pairs} pairs ({pct:.0f}%) have NO import edge but co-change frequently (hidden coupling).")
+        click.echo("\n".join(lines))
@@ -1,101 +1,142 @@
 """Find unprotected entry points — symbols with no path to a required gate."""
 
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
 
 import click
 
 from roam.db.connection import open_db, batched_in
-from roam.output.formatter import abbrev_kind, loc, format_table, to_json, json_envelope
+from roam.output.formatter import abbrev_kind, loc, format_table, json_envelope, emit_json
 from roam.commands.resolve import ensure_index
 
 
-def _find_gates(conn, gate_names, gate_pattern):
-    """Find gate symbol IDs by exact name or regex pattern."""
-    gates = set()
-    gate_info = {}
+def _find_gates_and_entries(conn, gate_names, gate_pattern, scope,
+                            entry_pattern):
+    """Find gate symbols and entry points in one query over symbols.
+
+    Gates match an exact ``--gate`` name or the ``--gate-pattern`` regex
+    (case-insensitive); entry points are exported top-level functions,
+    optionally scoped.  Each row is flagged ``is_gate`` / ``is_entry``.
+
+    Returns ``(gates, gate_info, entries)``.
+    """
+    gate_terms = []
+    params = []
 
     if gate_names:
-        names = [n.strip() for n in gate_names.split(",") if n.strip()]
-        for name in names:
-            rows = conn.execute(
-                "SELECT s.id, s.name, f.path as file_path, s.line_start "
-                "FROM symbols s JOIN files f ON s.file_id = f.id "
-                "WHERE s.name = ?",
-                (name,),
-            ).fetchall()
-            for r in rows:
-                gates.add(r["id"])
-                gate_info[r["id"]] = r["name"]
+        names = list(dict.fromkeys(
+            n.strip() for n in gate_names.split(",") if n.strip()
+        ))
+        if names:
+            gate_terms.append(f"s.name IN ({','.join('?' for _ in names)})")
+            params.extend(names)
 
     if gate_pattern:
-        regex = re.compile(gate_pattern, re.IGNORECASE)
-        rows = conn.execute(
-            "SELECT s.id, s.name, f.path as file_path, s.line_start "
-            "FROM symbols s JOIN files f ON s.file_id = f.id "
-        ).fetchall()
-        for r in rows:
-            if regex.search(r["name"]):
-                gates.add(r["id"])
-                gate_info[r["id"]] = r["name"]
-
-    return gates, gate_info
-
-
-def _find_entries(conn, scope, entry_pattern):
-    """Find entry point symbols — exported top-level functions, optionally scoped."""
-    sql = (
-        "SELECT s.id, s.name, s.kind, f.path as file_path, s.line_start "
-        "FROM symbols s JOIN files f ON s.file_id = f.id "
-        "WHERE s.is_exported = 1 AND s.kind IN ('function', 'method') "
-        "AND s.parent_id IS NULL "
+        # Compile up front so a bad pattern fails here, not mid-query
+        re.compile(gate_pattern, re.IGNORECASE)
+        gate_terms.append("s.name REGEXP ?")
+        params.append("(?i)" + gate_pattern)
+
+    entry_sql = (
+        "s.is_exported = 1 AND s.kind IN ('function', 'method') "
+        "AND s.parent_id IS NULL"
     )
-    params = []
-
     if scope:
-        # Convert glob to LIKE pattern
-        like = scope.replace("*", "%").replace("?", "_")
-        sql += "AND f.path LIKE ? "
-        params.append(like)
-
-    sql += "ORDER BY f.path, s.line_start"
-    rows = conn.execute(sql, params).fetchall()
+        # GLOB takes the pattern as-is ("**" is just "*" twice) and, unlike
+        # LIKE, can use idx_files_path for a literal prefix like "app/".
+        entry_sql += " AND f.path GLOB ?"
+        params.append(scope.replace("\\", "/"))
+
+    rows = conn.execute(
+        "SELECT s.id, s.name, s.kind, f.path as file_path, s.line_start, "
+        f"({' OR '.join(gate_terms) or '0'}) AS is_gate, "
+        f"({entry_sql}) AS is_entry "
+        "FROM symbols s JOIN files f ON s.file_id = f.id "
+        "WHERE is_gate OR is_entry "
+        "ORDER BY f.path, s.line_start",
+        params,
+    ).fetchall()
 
-    if entry_pattern:
-        regex = re.compile(entry_pattern, re.IGNORECASE)
-        rows = [r for r in rows if regex.search(r["name"])]
+    gates = set()
+    gate_info = {}
+    entries = []
+    entry_re = re.compile(entry_pattern, re.IGNORECASE) if entry_pattern else None
+    for r in rows:
+        if r["is_gate"]:
+            gates.add(r["id"])
+            gate_info[r["id"]] = r["name"]
+        if r["is_entry"] and (entry_re is None or entry_re.search(r["name"])):
+            entries.append(r)
 
-    return rows
+    return gates, gate_info, entries
 
 
 def _build_adj(conn):
-    """Build adjacency list from edges table (source → [targets])."""
+    """Build forward and reverse adjacency from the edges table.
+
+    Returns ``(adj, radj)``: source → {targets} and target → {sources}.
+    """
     adj = defaultdict(set)
-    for e in conn.execute("SELECT source_id, target_id FROM edges").fetchall():
-        adj[e["source_id"]].add(e["target_id"])
-    return adj
+    radj = defaultdict(set)
+    # Iterate the cursor rather than materialising every edge row first
+    for source_id, target_id in conn.execute(
+        "SELECT source_id, target_id FROM edges"
+    ):
+        adj[source_id].add(target_id)
+        radj[target_id].add(source_id)
+    return adj, radj
 
 
-def _bfs_to_gate(adj, start_id, gates, max_depth):
+def _gate_distances(radj, gates, max_depth):
+    """Hops from each symbol to its nearest gate, up to *max_depth*.
+
+    One multi-source BFS backwards from every gate at once.  Symbols that
+    cannot reach a gate within *max_depth* hops are absent.
+    """
+    dist = dict.fromkeys(gates, 0)
+    queue = deque(gates)
+    while queue:
+        current = queue.popleft()
+        depth = dist[current] + 1
+        if depth > max_depth:
+            continue
+        for caller in radj.get(current, ()):
+            if caller not in dist:
+                dist[caller] = depth
+                queue.append(caller)
+    return dist
+
+
+def _bfs_to_gate(adj, start_id, gates, max_depth, dist):
     """BFS from start_id to find shortest path to any gate symbol.
 
+    *dist* comes from :func:`_gate_distances`.  Neighbours that cannot
+    reach a gate in the hops left are never queued; a neighbour like that
+    never leads to a gate, so the gate and chain found are the ones the
+    unpruned search finds, and an entry with no gate in range costs nothing.
+
     Returns (gate_name, depth, chain) or (None, None, None) if not found.
     """
     if start_id in gates:
         return start_id, 0, [start_id]
+    if start_id not in dist:
+        return None, None, None
 
     visited = {start_id}
     # Queue entries: (node_id, depth, path)
-    queue = [(start_id, 0, [start_id])]
+    queue = deque([(start_id, 0, [start_id])])
 
     while queue:
-        current, depth, path = queue.pop(0)
+        current, depth, path = queue.popleft()
         if depth >= max_depth:
             continue
+        budget = max_depth - depth - 1
         for neighbor in adj.get(current, set()):
             if neighbor in visited:
                 continue
             visited.add(neighbor)
+            if dist.get(neighbor, budget + 1) > budget:
+                continue
             new_path = path + [neighbor]
             if neighbor in gates:
                 return neighbor, depth + 1, new_path
@@ -110,7 +151,8 @@ def _bfs_to_gate(adj, start_id, gates, max_depth):
 @click.option("--gate-pattern", "gate_pattern", default=None,
               help="Regex to match gate symbols by name (e.g. 'auth|permission|guard')")
 @click.option("--scope", default=None,
-              help="File scope glob (e.g. 'app/routes/**')")
+              help="Case-sensitive file path glob; * also matches '/', "
+                   "[...] is a character class (e.g. 'app/routes/*')")
 @click.option("--entry-pattern", "entry_pattern", default=None,
               help="Regex to filter entry points by name (e.g. 'handler|controller')")
 @click.option("--max-depth", default=8, show_default=True, help="Max BFS depth")
@@ -130,59 +172,39 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
         raise SystemExit(1)
 
     with open_db(readonly=True) as conn:
-        gates, gate_info = _find_gates(conn, gate_names, gate_pattern)
+        gates, gate_info, entries = _find_gates_and_entries(
+            conn, gate_names, gate_pattern, scope, entry_pattern,
+        )
 
         if not gates:
             if json_mode:
-                click.echo(to_json(json_envelope("coverage-gaps",
+                emit_json(json_envelope("coverage-gaps",
                     summary={"error": "No gate symbols found"},
-                )))
+                ))
             else:
                 click.echo("No gate symbols found matching the criteria.")
             return
 
-        entries = _find_entries(conn, scope, entry_pattern)
         if not entries:
             if json_mode:
-                click.echo(to_json(json_envelope("coverage-gaps",
+                emit_json(json_envelope("coverage-gaps",
                     summary={"error": "No entry points found"},
-                )))
+                ))
             else:
                 click.echo("No entry points found in scope.")
             return
 
-        adj = _build_adj(conn)
-
-        # Resolve symbol names for chain display
-        id_to_name = {}
-        all_ids = set()
-        for e in entries:
-            all_ids.add(e["id"])
-        for g in gates:
-            all_ids.add(g)
-        # Batch fetch names
-        if all_ids:
-            for r in batched_in(
-                conn,
-                "SELECT id, name FROM symbols WHERE id IN ({ph})",
-                list(all_ids),
-            ):
-                id_to_name[r["id"]] = r["name"]
+        adj, radj = _build_adj(conn)
+        dist = _gate_distances(radj, gates, max_depth)
 
         covered = []
         uncovered = []
 
         for entry in entries:
-            gate_id, depth, chain = _bfs_to_gate(adj, entry["id"], gates, max_depth)
+            gate_id, depth, chain = _bfs_to_gate(
+                adj, entry["id"], gates, max_depth, dist,
+            )
             if gate_id is not None:
-                # Resolve chain names (lazy — fetch as needed)
-                chain_names = []
-                for sid in chain:
-                    if sid not in id_to_name:
-                        r = conn.execute("SELECT name FROM symbols WHERE id = ?", (sid,)).fetchone()
-                        id_to_name[sid] = r["name"] if r else "?"
-                    chain_names.append(id_to_name[sid])
-
                 covered.append({
                     "name": entry["name"],
                     "kind": entry["kind"],
@@ -190,7 +212,7 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
                     "line": entry["line_start"],
                     "gate": gate_info.get(gate_id, "?"),
                     "depth": depth,
-                    "chain": chain_names,
+                    "chain": chain,  # symbol ids, named below
                 })
             else:
                 uncovered.append({
@@ -201,11 +223,23 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
                     "reason": f"no gate in call chain (searched {max_depth} hops)",
                 })
 
+        # Name only the symbols on reported chains, in one batched lookup
+        chain_ids = {sid for c in covered for sid in c["chain"]}
+        id_to_name = {
+            r["id"]: r["name"]
+            for r in batched_in(
+                conn, "SELECT id, name FROM symbols WHERE id IN ({ph})",
+                list(chain_ids),
+            )
+        }
+        for c in covered:
+            c["chain"] = [id_to_name.get(sid, "?") for sid in c["chain"]]
+
         total = len(entries)
         coverage_pct = round(len(covered) * 100 / total, 1) if total else 0
 
         if json_mode:
-            click.echo(to_json(json_envelope("coverage-gaps",
+            emit_json(json_envelope("coverage-gaps",
                 summary={
                     "total_entries": total,
                     "covered": len(covered),
@@ -216,18 +250,21 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
                 gates_found=sorted(set(gate_info.values())),
                 uncovered=uncovered,
                 covered=covered,
-            )))
+            ))
             return
 
         # --- Text output ---
-        click.echo(f"=== Coverage Gaps ===\n")
-        click.echo(f"Gates: {', '.join(sorted(set(gate_info.values())))}")
-        click.echo(f"Entry points: {total}  Covered: {len(covered)}  "
-                    f"Uncovered: {len(uncovered)}  Coverage: {coverage_pct}%")
-        click.echo()
+        lines = [
+            "=== Coverage Gaps ===",
+            "",
+            f"Gates: {', '.join(sorted(set(gate_info.values())))}",
+            f"Entry points: {total}  Covered: {len(covered)}  "
+            f"Uncovered: {len(uncovered)}  Coverage: {coverage_pct}%",
+            "",
+        ]
 
         if uncovered:
-            click.echo(f"-- Uncovered ({len(uncovered)}) --")
+            lines.append(f"-- Uncovered ({len(uncovered)}) --")
             rows = []
             for u in uncovered[:30]:
                 rows.append([
@@ -235,15 +272,15 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
                     loc(u["file"], u["line"]),
                     u["reason"],
                 ])
-            click.echo(format_table(
+            lines.append(format_table(
                 ["Name", "Kind", "Location", "Reason"],
                 rows,
                 budget=30,
             ))
-            click.echo()
+            lines.append("")
 
         if covered:
-            click.echo(f"-- Covered ({len(covered)}) --")
+            lines.append(f"-- Covered ({len(covered)}) --")
             rows = []
             for c in covered[:20]:
                 chain_str = " -> ".join(c["chain"][:5])
@@ -255,8 +292,10 @@ def coverage_gaps(ctx, gate_names, gate_pattern, scope, entry_pattern, max_depth
                     c["gate"], str(c["depth"]),
                     chain_str,
                 ])
-            click.echo(format_table(
+            lines.append(format_table(
                 ["Name", "Kind", "Location", "Gate", "Depth", "Chain"],
                 rows,
                 budget=20,
             ))
+
+        click.echo("\n".join(lines))
@@ -9,7 +9,7 @@ import click
 from roam.db.connection import find_project_root, open_db
 from roam.output.formatter import abbrev_kind, loc, to_json, json_envelope
 from roam.commands.resolve import ensure_index
-from roam.commands.changed_files import is_test_file
+from roam.paths import is_test_file
 
 
 # ---------------------------------------------------------------------------
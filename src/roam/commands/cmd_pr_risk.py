@@ -8,8 +8,9 @@ from roam.db.connection import open_db, find_project_root
 from roam.output.formatter import format_table, to_json, json_envelope
 from roam.commands.resolve import ensure_index
 from roam.commands.changed_files import (
-    get_changed_files, resolve_changed_to_db, is_test_file, is_low_risk_file,
+    get_changed_files, resolve_changed_to_db, is_low_risk_file,
 )
+from roam.paths import is_test_file
 from roam.commands.cmd_coupling import _compute_surprise
 
 
@@ -19,8 +19,8 @@ from roam.commands.resolve import ensure_index, find_symbol
 from roam.commands.changed_files import (
     get_changed_files,
     resolve_changed_to_db,
-    is_test_file,
 )
+from roam.paths import is_test_file
 from roam.commands.cmd_affected_tests import (
     _bfs_reverse_callers,
     _gather_affected_tests,
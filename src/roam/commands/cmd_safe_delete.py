@@ -7,16 +7,7 @@ import click
 from roam.db.connection import open_db
 from roam.output.formatter import abbrev_kind, loc, format_table, to_json, json_envelope
 from roam.commands.resolve import ensure_index, find_symbol
-
-
-_TEST_NAME_PATS = ["test_", "_test.", ".test.", ".spec."]
-_TEST_DIR_PATS = ["tests/", "test/", "__tests__/", "spec/"]
-
-
-def _is_test_file(path):
-    p = path.replace("\\", "/")
-    bn = os.path.basename(p)
-    return any(pat in bn for pat in _TEST_NAME_PATS) or any(d in p for d in _TEST_DIR_PATS)
+from roam.paths import is_test_file
 
 
 @click.command("safe-delete")
@@ -48,8 +39,10 @@ def safe_delete(ctx, name):
             (sym_id,),
         ).fetchall()
 
-        test_callers = [c for c in callers if _is_test_file(c["file_path"])]
-        non_test_callers = [c for c in callers if not _is_test_file(c["file_path"])]
+        test_callers = []
+        non_test_callers = []
+        for c in callers:
+            (test_callers if is_test_file(c["file_path"]) else non_test_callers).append(c)
 
         # --- Transitive impact ---
         from roam.graph.builder import build_symbol_graph
@@ -14,9 +14,10 @@ def collect_metrics(conn):
     god_components, bottlenecks, dead_exports, layer_violations,
     health_score (0-100, higher = healthier).
     """
-    files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
-    symbols = conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
-    edges = conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+    files, symbols, edges = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM files), (SELECT COUNT(*) FROM symbols), "
+        "(SELECT COUNT(*) FROM edges)"
+    ).fetchone()
 
     # Cycles
     try:
@@ -201,3 +202,15 @@ def get_snapshots(conn, limit=None, since=None):
         sql += " LIMIT ?"
         params.append(limit)
     return conn.execute(sql, params).fetchall()
+
+
+def get_snapshots_chrono(conn):
+    """Fetch the full snapshot history, oldest first.
+
+    Ordering happens in SQL so callers that walk history forwards need no
+    reversal pass.  Snapshots taken within the same second keep insertion
+    order.
+    """
+    return conn.execute(
+        "SELECT * FROM snapshots ORDER BY timestamp ASC, id ASC"
+    ).fetchall()
@@ -2,7 +2,7 @@
 
 import click
 
-from roam.db.connection import db_exists
+from roam.db.connection import db_exists, batched_in
 from roam.db.queries import SYMBOL_BY_NAME, SYMBOL_BY_QUALIFIED, SEARCH_SYMBOLS
 
 
@@ -62,6 +62,20 @@ def _filter_by_file(rows, file_hint):
     return filtered if filtered else rows
 
 
+def _pick(conn, rows, file_hint):
+    """Apply the file hint and disambiguation to one lookup step's rows."""
+    if file_hint:
+        rows = _filter_by_file(rows, file_hint)
+    if len(rows) == 1:
+        return rows[0]
+    if len(rows) > 1:
+        best = pick_best(conn, rows)
+        if best:
+            return best
+        return rows[0]
+    return None
+
+
 def find_symbol(conn, name):
     """Find a symbol by name with disambiguation.
 
@@ -79,38 +93,58 @@ def find_symbol(conn, name):
 
     # 1. Qualified name match
     rows = conn.execute(SYMBOL_BY_QUALIFIED, (symbol_name,)).fetchall()
-    if file_hint:
-        rows = _filter_by_file(rows, file_hint)
-    if len(rows) == 1:
-        return rows[0]
-    if len(rows) > 1:
-        best = pick_best(conn, rows)
-        if best:
-            return best
-        return rows[0]
+    sym = _pick(conn, rows, file_hint)
+    if sym is not None:
+        return sym
 
     # 2. Simple name match
     rows = conn.execute(SYMBOL_BY_NAME, (symbol_name,)).fetchall()
-    if file_hint:
-        rows = _filter_by_file(rows, file_hint)
-    if len(rows) == 1:
-        return rows[0]
-    if len(rows) > 1:
-        best = pick_best(conn, rows)
-        if best:
-            return best
-        return rows[0]
+    sym = _pick(conn, rows, file_hint)
+    if sym is not None:
+        return sym
 
     # 3. Fuzzy match
     rows = conn.execute(SEARCH_SYMBOLS, (f"%{symbol_name}%", 10)).fetchall()
-    if file_hint:
-        rows = _filter_by_file(rows, file_hint)
-    if len(rows) == 1:
-        return rows[0]
-    if len(rows) > 1:
-        best = pick_best(conn, rows)
-        if best:
-            return best
-        return rows[0]
+    return _pick(conn, rows, file_hint)
 
-    return None
+
+def find_symbols(conn, names):
+    """Resolve several names at once; returns ``{name: row or None}``.
+
+    Follows the same lookup chain as :func:`find_symbol`, but the exact
+    qualified-name and simple-name steps for all names share one batched
+    query.  Only names that miss both fall back to the per-name fuzzy match.
+    """
+    parsed = {name: _parse_file_hint(name) for name in dict.fromkeys(names)}
+    wanted = list(dict.fromkeys(sym_name for _, sym_name in parsed.values()))
+
+    # A row can match through different IN batches, so dedupe by id and
+    # keep id order (the order the single-name lookups return).
+    rows = {
+        r["id"]: r
+        for r in batched_in(
+            conn,
+            "SELECT s.*, f.path as file_path "
+            "FROM symbols s JOIN files f ON s.file_id = f.id "
+            "WHERE s.qualified_name IN ({ph}) OR s.name IN ({ph})",
+            wanted,
+        )
+    }
+    by_qualified = {}
+    by_name = {}
+    for _, r in sorted(rows.items()):
+        by_qualified.setdefault(r["qualified_name"], []).append(r)
+        by_name.setdefault(r["name"], []).append(r)
+
+    found = {}
+    for name, (file_hint, symbol_name) in parsed.items():
+        sym = _pick(conn, by_qualified.get(symbol_name, []), file_hint)
+        if sym is None:
+            sym = _pick(conn, by_name.get(symbol_name, []), file_hint)
+        if sym is None:
+            rows = conn.execute(
+                SEARCH_SYMBOLS, (f"%{symbol_name}%", 10),
+            ).fetchall()
+            sym = _pick(conn, rows, file_hint)
+        found[name] = sym
+    return found
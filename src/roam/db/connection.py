@@ -2,16 +2,27 @@
 
 from __future__ import annotations
 
+import re
 import sqlite3
 import os
 from pathlib import Path
 from contextlib import contextmanager
+from functools import lru_cache
 
 from roam.db.schema import SCHEMA_SQL
+from roam.paths import is_test_file
 
 DEFAULT_DB_DIR = ".roam"
 DEFAULT_DB_NAME = "index.db"
 
+# Prepared-statement cache per connection (sqlite3 default is 128); commands
+# such as batch context cycle through more distinct queries than that.
+_STATEMENT_CACHE_SIZE = 256
+
+# Read-only connections memory-map the index so large scans read pages
+# straight from the OS page cache instead of through pread() copies.
+_MMAP_SIZE = 256 * 1024 * 1024
+
 
 def find_project_root(start: str = ".") -> Path:
     """Find the project root by looking for .git directory."""
@@ -39,9 +50,11 @@ def get_connection(db_path: Path | None = None, readonly: bool = False) -> sqlit
 
     if readonly:
         uri = db_path.as_uri() + "?mode=ro"
-        conn = sqlite3.connect(uri, uri=True, timeout=30)
+        conn = sqlite3.connect(uri, uri=True, timeout=30,
+                               cached_statements=_STATEMENT_CACHE_SIZE)
     else:
-        conn = sqlite3.connect(str(db_path), timeout=30)
+        conn = sqlite3.connect(str(db_path), timeout=30,
+                               cached_statements=_STATEMENT_CACHE_SIZE)
 
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
@@ -49,9 +62,35 @@ def get_connection(db_path: Path | None = None, readonly: bool = False) -> sqlit
     conn.execute("PRAGMA cache_size=-64000")  # 64MB cache
     conn.execute("PRAGMA foreign_keys=ON")
     conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+    _register_functions(conn)
     return conn
 
 
+def _register_functions(conn: sqlite3.Connection):
+    """Register roam's SQL functions once, when the connection is opened.
+
+    Redefining a function later would reset the connection's prepared
+    statement cache (and fails while a cursor is active), so commands must
+    not register these themselves.  ``is_test_file`` is still a Python
+    callback, invoked once per row it is applied to.  ``regexp`` backs the
+    ``X REGEXP pattern`` operator, so patterns arrive as bound parameters.
+    """
+    conn.create_function("is_test_file", 1, is_test_file, deterministic=True)
+    conn.create_function("regexp", 2, _regexp, deterministic=True)
+
+
+@lru_cache(maxsize=64)
+def _compile_regexp(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def _regexp(pattern, value) -> bool:
+    """SQL ``regexp(pattern, value)``: Python ``re.search`` semantics."""
+    return value is not None and _compile_regexp(pattern).search(value) is not None
+
+
 def ensure_schema(conn: sqlite3.Connection):
     """Create tables if they don't exist, and apply migrations."""
     conn.executescript(SCHEMA_SQL)
@@ -65,6 +104,13 @@ def ensure_schema(conn: sqlite3.Connection):
     _safe_alter(conn, "snapshots", "avg_complexity", "REAL")
     _safe_alter(conn, "snapshots", "brain_methods", "INTEGER")
 
+    # Single-column edge indexes superseded by the covering
+    # (source_id, target_id) / (target_id, source_id) pairs
+    conn.execute("DROP INDEX IF EXISTS idx_edges_source")
+    conn.execute("DROP INDEX IF EXISTS idx_edges_target")
+    # Superseded by the covering (source, target, symbol_count) index
+    conn.execute("DROP INDEX IF EXISTS idx_file_edges_source")
+
 
 def _safe_alter(conn: sqlite3.Connection, table: str, column: str, col_type: str):
     """Add a column to a table if it doesn't exist."""
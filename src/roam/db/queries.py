@@ -6,6 +6,14 @@ FILE_BY_ID = "SELECT * FROM files WHERE id = ?"
 ALL_FILES = "SELECT * FROM files ORDER BY path"
 FILES_BY_LANGUAGE = "SELECT * FROM files WHERE language = ? ORDER BY path"
 FILE_COUNT = "SELECT COUNT(*) as cnt FROM files"
+# Exact path first (index seek); the suffix LIKE scan only runs on a miss,
+# since UNION ALL stops once the outer LIMIT is met.  Params: (path, "%path")
+FILE_BY_PATH_OR_SUFFIX = """
+    SELECT * FROM files WHERE path = ?1
+    UNION ALL
+    SELECT * FROM (SELECT * FROM files WHERE path LIKE ?2 ORDER BY id LIMIT 1)
+    LIMIT 1
+"""
 
 # Symbol queries
 SYMBOLS_IN_FILE = """
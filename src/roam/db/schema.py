@@ -95,18 +95,21 @@ CREATE INDEX IF NOT EXISTS idx_symbols_file ON symbols(file_id);
 CREATE INDEX IF NOT EXISTS idx_symbols_name ON symbols(name);
 CREATE INDEX IF NOT EXISTS idx_symbols_qualified ON symbols(qualified_name);
 CREATE INDEX IF NOT EXISTS idx_symbols_kind ON symbols(kind);
-CREATE INDEX IF NOT EXISTS idx_edges_source ON edges(source_id);
-CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target_id);
+CREATE INDEX IF NOT EXISTS idx_edges_source_target ON edges(source_id, target_id);
+CREATE INDEX IF NOT EXISTS idx_edges_target_source ON edges(target_id, source_id);
 CREATE INDEX IF NOT EXISTS idx_edges_kind ON edges(kind);
-CREATE INDEX IF NOT EXISTS idx_file_edges_source ON file_edges(source_file_id);
+CREATE INDEX IF NOT EXISTS idx_file_edges_source_target ON file_edges(source_file_id, target_file_id, symbol_count);
 CREATE INDEX IF NOT EXISTS idx_file_edges_target ON file_edges(target_file_id);
 CREATE INDEX IF NOT EXISTS idx_git_changes_file ON git_file_changes(file_id);
 CREATE INDEX IF NOT EXISTS idx_git_changes_commit ON git_file_changes(commit_id);
+CREATE INDEX IF NOT EXISTS idx_cochange_b ON git_cochange(file_id_b);
+CREATE INDEX IF NOT EXISTS idx_cochange_count ON git_cochange(cochange_count DESC);
 CREATE INDEX IF NOT EXISTS idx_files_path ON files(path);
 CREATE INDEX IF NOT EXISTS idx_graph_metrics_pagerank ON graph_metrics(pagerank DESC);
 CREATE INDEX IF NOT EXISTS idx_symbols_parent ON symbols(parent_id);
 CREATE INDEX IF NOT EXISTS idx_edges_kind_target ON edges(kind, target_id);
 CREATE INDEX IF NOT EXISTS idx_file_stats_churn ON file_stats(total_churn DESC);
+CREATE INDEX IF NOT EXISTS idx_clusters_cluster ON clusters(cluster_id);
 
 -- Hypergraph: n-ary commit patterns (beyond pairwise co-change)
 CREATE TABLE IF NOT EXISTS git_hyperedges (
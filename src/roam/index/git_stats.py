@@ -8,7 +8,7 @@ import math
 import sqlite3
 import subprocess
 import time as _time
-from collections import defaultdict
+from collections import Counter, defaultdict
 from itertools import combinations
 from pathlib import Path
 
@@ -229,14 +229,14 @@ def compute_cochange(conn: sqlite3.Connection):
         fid = row[1] if not isinstance(row, sqlite3.Row) else row["file_id"]
         commit_files[cid].add(fid)
 
-    # Accumulate pair counts
-    pair_counts: dict[tuple[int, int], int] = defaultdict(int)
+    # Accumulate pair counts; Counter.update tallies each commit's pairs
+    # in C rather than one Python-level increment per pair
+    pair_counts: Counter[tuple[int, int]] = Counter()
     for file_ids in commit_files.values():
         if len(file_ids) < 2 or len(file_ids) > 100:
             # Skip trivially small or very large commits (likely bulk reformats)
             continue
-        for a, b in combinations(sorted(file_ids), 2):
-            pair_counts[(a, b)] += 1
+        pair_counts.update(combinations(sorted(file_ids), 2))
 
     # Write in chunks
     with conn:
@@ -770,6 +770,12 @@ class Indexer:
             except Exception as e:
                 _log(f"  Cognitive load computation failed: {e}")
 
+            # 13. Refresh planner statistics (sqlite_stat1) so read-only
+            # commands get index-aware plans; the analysis limit keeps
+            # this cheap on large indexes.
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+
             # Log parse error summary
             from roam.index.parser import get_parse_error_summary
             error_summary = get_parse_error_summary()
@@ -7,6 +7,8 @@ import os
 import time
 from datetime import datetime, timezone
 
+import click
+
 KIND_ABBREV = {
     "function": "fn",
     "class": "cls",
@@ -111,6 +113,11 @@ def to_json(data) -> str:
     return _json.dumps(data, indent=2, default=str)
 
 
+def emit_json(data) -> None:
+    """Write *data* as JSON to stdout, followed by a newline."""
+    click.echo(to_json(data))
+
+
 def json_envelope(command: str, summary: dict | None = None, **payload) -> dict:
     """Wrap command output in a self-describing envelope.
 
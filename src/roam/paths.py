@@ -0,0 +1,24 @@
+"""Path classification helpers shared by the database layer and commands."""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+
+# Name markers must fall in the basename (no "/" after them); directory
+# markers match anywhere in the path.
+_TEST_RE = re.compile(
+    r"(?:test_|_test\.|\.test\.|\.spec\.)[^/]*$"
+    r"|(?:tests|test|__tests__|spec)/"
+)
+
+
+@lru_cache(maxsize=4096)
+def is_test_file(path: str) -> bool:
+    """Check if a file path looks like a test file.
+
+    Cached: the same caller/callee paths are classified many times per
+    command.
+    """
+    return _TEST_RE.search(path.replace("\\", "/")) is not None
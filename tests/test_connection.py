@@ -0,0 +1,31 @@
+"""Tests for SQLite connection setup in roam.db.connection."""
+
+from roam.db.connection import get_connection, ensure_schema
+
+
+def test_readonly_connection_is_memory_mapped(tmp_path):
+    """Read-only connections enable mmap on top of the shared pragmas."""
+    db = tmp_path / "index.db"
+    conn = get_connection(db)
+    ensure_schema(conn)
+    conn.close()
+
+    conn = get_connection(db, readonly=True)
+    try:
+        assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64000
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_connection_registers_is_test_file(tmp_path):
+    """is_test_file is available in SQL from the moment a connection opens."""
+    conn = get_connection(tmp_path / "index.db")
+    try:
+        row = conn.execute(
+            "SELECT is_test_file('tests/test_a.py'), is_test_file('src/a.py')"
+        ).fetchone()
+        assert tuple(row) == (1, 0)
+    finally:
+        conn.close()
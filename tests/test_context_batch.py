@@ -77,3 +77,74 @@ def test_context_batch_json(context_project):
     assert "symbols" in data
     assert len(data["symbols"]) == 3
     assert "shared_callers" in data
+
+
+def test_context_batch_matches_single(context_project):
+    out, rc = _roam("--json", "context", "a", "b", "entry", cwd=context_project)
+    assert rc == 0, out
+    batch = {s["name"]: s for s in json.loads(out)["symbols"]}
+    for name in ("a", "b", "entry"):
+        out, rc = _roam("--json", "context", name, cwd=context_project)
+        assert rc == 0, out
+        single = json.loads(out)
+        for key in ("callers", "callees"):
+            assert [(c["name"], c["location"]) for c in batch[name][key]] == [
+                (c["name"], c["location"]) for c in single[key]
+            ]
+
+
+@pytest.fixture
+def wide_caller_project(tmp_path):
+    """Two symbols sharing more callers than fit in one IN-list batch."""
+    root = tmp_path / "context_wide_project"
+    root.mkdir()
+
+    (root / "core.py").write_text(
+        "def alpha():\n"
+        "    return 1\n\n"
+        "def beta():\n"
+        "    return 2\n"
+    )
+    for m in range(6):
+        body = "".join(
+            f"def use_{m}_{i}():\n"
+            "    return alpha() + beta()\n\n"
+            for i in range(75)
+        )
+        (root / f"mod_{m}.py").write_text("from core import alpha, beta\n\n" + body)
+
+    _git(root, "init")
+    _git(root, "config", "user.email", "t@t.com")
+    _git(root, "config", "user.name", "Test")
+    _git(root, "add", ".")
+    _git(root, "commit", "-m", "init")
+
+    out, rc = _roam("index", "--force", cwd=root)
+    assert rc == 0, out
+    return root
+
+
+def test_context_batch_temp_table_matches_in_list(wide_caller_project, monkeypatch):
+    """Shared callers past the inline limit go through a TEMP table on a
+    read-only connection and match the IN-list path."""
+    from roam.commands import cmd_context
+    from roam.commands.resolve import find_symbols
+    from roam.db.connection import open_db
+
+    monkeypatch.chdir(wide_caller_project)
+    inline_max = cmd_context._RESOLVE_INLINE_MAX
+    with open_db(readonly=True) as conn:
+        found = find_symbols(conn, ["alpha", "beta"])
+        contexts = cmd_context._gather_symbol_contexts(
+            conn, [found["alpha"], found["beta"]],
+        )
+        via_temp = cmd_context._batch_context(conn, contexts)[0]
+        monkeypatch.setattr(cmd_context, "_RESOLVE_INLINE_MAX", 10**6)
+        via_in = cmd_context._batch_context(conn, contexts)[0]
+
+    assert len(via_temp) == 450 > inline_max
+    temp_rows = [tuple(r) for r in via_temp]
+    # The temp-table join sorts the whole result; the IN-list path sorts
+    # each chunk, so compare contents and check the global order separately.
+    assert sorted(temp_rows) == sorted(tuple(r) for r in via_in)
+    assert temp_rows == sorted(temp_rows, key=lambda r: (r[2], r[3]))
@@ -141,3 +141,20 @@ def test_coupling_against_includes_partner(coupling_project):
     data = json.loads(out)
     assert not any(item["path"] == "b.py" for item in data["missing_cochanges"])
     assert any(item["path"] == "b.py" for item in data["included_partners"])
+
+
+def test_coupling_json_in_process_redirected_stdout(coupling_project, monkeypatch):
+    """--json output can be captured in-process through redirect_stdout."""
+    import contextlib
+    import io
+
+    from roam.cli import cli
+
+    monkeypatch.chdir(coupling_project)
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        cli.main(["--json", "coupling", "-n", "5"], standalone_mode=False)
+
+    data = json.loads(buf.getvalue())
+    assert data["command"] == "coupling"
+    assert data["summary"]["pairs"] == len(data["pairs"]) > 0
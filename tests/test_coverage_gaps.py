@@ -136,3 +136,91 @@ def test_coverage_gaps_text_has_sections(app_project):
     assert rc == 0, out
     assert "Uncovered" in out
     assert "Covered" in out
+
+
+def test_coverage_gaps_multiple_gate_names(app_project):
+    out, rc = _roam(
+        "--json",
+        "coverage-gaps",
+        "--gate",
+        "helper_gate, require_user,missing_gate",
+        "--scope",
+        "app/routes/**",
+        cwd=app_project,
+    )
+    assert rc == 0, out
+
+    data = json.loads(out)
+    assert data["gates_found"] == ["helper_gate", "require_user"]
+    assert data["summary"]["covered"] == 2
+    gates_by_name = {item["name"]: item["gate"] for item in data["covered"]}
+    assert gates_by_name["action"] == "helper_gate"
+
+
+def test_coverage_gaps_scope_character_class(app_project):
+    out, rc = _roam(
+        "--json",
+        "coverage-gaps",
+        "--gate",
+        "require_user",
+        "--scope",
+        "app/routes/[np]*.py",
+        cwd=app_project,
+    )
+    assert rc == 0, out
+
+    data = json.loads(out)
+    files = {item["file"] for item in data["covered"] + data["uncovered"]}
+    assert files == {
+        "app/routes/nested.py", "app/routes/private.py", "app/routes/public.py",
+    }
+
+
+def test_coverage_gaps_scope_is_case_sensitive(app_project):
+    out, rc = _roam(
+        "--json",
+        "coverage-gaps",
+        "--gate",
+        "require_user",
+        "--scope",
+        "App/Routes/*",
+        cwd=app_project,
+    )
+    assert rc == 0, out
+
+    data = json.loads(out)
+    assert data["summary"]["error"] == "No entry points found"
+
+
+def test_coverage_gaps_scope_star_crosses_directories(app_project):
+    out, rc = _roam(
+        "--json",
+        "coverage-gaps",
+        "--gate",
+        "require_user",
+        "--scope",
+        "app/*.py",
+        cwd=app_project,
+    )
+    assert rc == 0, out
+
+    data = json.loads(out)
+    files = {item["file"] for item in data["covered"] + data["uncovered"]}
+    assert "app/routes/private.py" in files
+
+
+def test_coverage_gaps_gate_pattern_is_case_insensitive(app_project):
+    out, rc = _roam(
+        "--json",
+        "coverage-gaps",
+        "--gate-pattern",
+        "^REQUIRE_",
+        "--scope",
+        "app/routes/**",
+        cwd=app_project,
+    )
+    assert rc == 0, out
+
+    data = json.loads(out)
+    assert data["gates_found"] == ["require_user"]
+    assert data["summary"]["covered"] == 2
@@ -118,6 +118,42 @@ def test_context_command_uses_resolve(resolve_project):
     assert "utils.py" in out
 
 
+def test_find_symbols_matches_find_symbol(resolve_project, monkeypatch):
+    """Bulk resolution picks the same rows as one-by-one find_symbol."""
+    from roam.db.connection import open_db
+    from roam.commands.resolve import find_symbol, find_symbols
+
+    monkeypatch.chdir(resolve_project)
+    names = ["deleteRow", "uniqueHelper", "file_b:deleteRow",
+             "Helper", "nonExistentSymbol12345"]
+    with open_db(readonly=True) as conn:
+        found = find_symbols(conn, names)
+        for name in names:
+            single = find_symbol(conn, name)
+            bulk = found[name]
+            assert (bulk and bulk["id"]) == (single and single["id"]), name
+
+
+def test_context_reports_all_missing_symbols(resolve_project):
+    """roam context lists every unresolved name, not just the first."""
+    out, rc = roam("context", "uniqueHelper", "zzzMissingOne", "zzzMissingTwo",
+                   cwd=resolve_project)
+    assert rc != 0
+    assert "zzzMissingOne" in out
+    assert "zzzMissingTwo" in out
+
+
+def test_deleted_index_is_rebuilt(resolve_project):
+    """A command run after the index DB is deleted rebuilds it first."""
+    db_path = resolve_project / ".roam" / "index.db"
+    assert db_path.exists()
+    db_path.unlink()
+    out, rc = roam("context", "uniqueHelper", cwd=resolve_project)
+    assert rc == 0, out
+    assert "No index found" in out
+    assert db_path.exists()
+
+
 # ---- Unit tests for _closest_symbol with line_start data ----
 
 class TestClosestSymbol:
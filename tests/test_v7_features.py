@@ -917,3 +917,27 @@ class TestFormatterCompact:
         """format_table_compact with empty rows should return (none)."""
         from roam.output.formatter import format_table_compact
         assert format_table_compact(["a"], []) == "(none)"
+
+    def test_to_json_matches_stdlib(self):
+        """to_json output is stdlib json's, whatever else is installed."""
+        import json
+        from datetime import datetime
+        from roam.output.formatter import to_json
+        data = {
+            "small": 1e-7, "nan": float("nan"), "inf": float("inf"),
+            "when": datetime(2026, 1, 2, 3, 4, 5), "name": "café",
+        }
+        assert to_json(data) == json.dumps(data, indent=2, default=str)
+        assert '"small": 1e-07' in to_json(data)
+        assert '"nan": NaN' in to_json(data)
+
+    def test_emit_json_to_redirected_stdout(self):
+        """emit_json works on text-only streams and matches click.echo(to_json)."""
+        import contextlib
+        import io
+        from roam.output.formatter import emit_json, to_json
+        data = {"command": "x", "items": [1, 2.5, None], "name": "café"}
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            emit_json(data)
+        assert buf.getvalue() == to_json(data) + "\n"